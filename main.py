@@ -108,7 +108,7 @@ class WutheringWavesGachaPlugin(Star):
             
             # 保存图片
             image.save(file_path, format="PNG")
-            logger.info(f"已保存抽卡结果图片: {file_path}")
+            logger.info("已保存抽卡结果图片: %s", file_path)
             
         except Exception as e:
             logger.error(f"保存抽卡结果图片失败: {e}")
@@ -723,4 +723,6 @@ class WutheringWavesGachaPlugin(Star):
         """
         插件销毁方法，在插件卸载时调用
         """
+        # 等待后台尚未完成的抽卡记录写入
+        self.gdb_ops.close()
         logger.info("鸣潮模拟抽卡插件已卸载")
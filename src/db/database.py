@@ -6,6 +6,7 @@
 
 import sqlite3
 import threading
+from collections.abc import Iterator
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -52,13 +53,30 @@ class CommonDatabase:
         """初始化数据库表结构 - 由子类或专门的初始化函数负责"""
         pass
 
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """
+        配置新建连接的 PRAGMA
+
+        journal_mode 会持久化到数据库文件，其余 PRAGMA 只对当前连接生效，
+        因此每个线程局部连接建立时都需要执行一次。
+
+        Args:
+            conn: 新建的数据库连接
+        """
+        conn.execute("PRAGMA foreign_keys = ON")  # 启用外键约束
+        conn.execute("PRAGMA busy_timeout = 30000")  # 锁等待超时（毫秒），避免并发写入时立即报错
+        conn.execute("PRAGMA temp_store = MEMORY")  # 临时表和索引放在内存中
+        conn.execute("PRAGMA cache_size = -20000")  # 页缓存约 20MB
+        if str(self.db_path) != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")  # 启用WAL模式，提高并发性能
+            conn.execute("PRAGMA synchronous = NORMAL")  # WAL模式下可安全降低同步级别，减少fsync
+
     def _get_thread_local_connection(self):
         """获取线程局部的数据库连接"""
         if not hasattr(self._local, "conn") or self._local.conn is None:
             try:
                 self._local.conn = sqlite3.connect(self.db_path)
-                self._local.conn.execute("PRAGMA foreign_keys = ON")  # 启用外键约束
-                self._local.conn.execute("PRAGMA journal_mode = WAL")  # 启用WAL模式，提高并发性能
+                self._configure_connection(self._local.conn)
             except sqlite3.Error as e:
                 logger.error(f"数据库连接错误: {e}")
                 raise
@@ -80,53 +98,116 @@ class CommonDatabase:
         获取数据库连接上下文
         
         注意：现在复用线程局部连接，不再每次都关闭。
+        发生任何异常时都会回滚未提交的事务，否则显式开启的事务会一直留在
+        线程局部连接上，该线程之后的 BEGIN IMMEDIATE 都会失败
         """
         conn = self._get_thread_local_connection()
         try:
             yield conn
             # 如果是写操作，调用者应该手动 commit，或者我们在 execute_update 中 commit
             # 对于复用的连接，我们不在此处 close
-        except sqlite3.Error:
-            if conn:
+        except BaseException:
+            if conn and conn.in_transaction:
                 conn.rollback()
             raise
         # finally 块中不再关闭连接
 
+    @staticmethod
+    def _query_cursor(conn: sqlite3.Connection, named_rows: bool) -> sqlite3.Cursor:
+        """
+        创建查询游标
+
+        Args:
+            conn: 数据库连接
+            named_rows: 为True时返回可按列名访问的 sqlite3.Row，否则返回普通元组
+
+        Returns:
+            设置好行工厂的游标
+        """
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row if named_rows else None
+        return cursor
+
     # 通用数据库操作方法
-    def execute_query(self, query: str, params: tuple = ()) -> list[sqlite3.Row]:
+    def execute_query(
+        self, query: str, params: tuple = (), named_rows: bool = True
+    ) -> list[sqlite3.Row]:
         """
         执行查询操作
 
         Args:
             query: SQL查询语句
             params: 查询参数
+            named_rows: 为False时返回普通元组，只按位置取值的调用方可省去构造 Row 的开销
 
         Returns:
             查询结果列表
         """
         try:
             with self.get_connection() as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+                cursor = self._query_cursor(conn, named_rows)
                 cursor.execute(query, params)
                 return cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"查询执行错误: {e}, SQL: {query}, Params: {params}")
             raise
 
-    def execute_query_single(self, query: str, params: tuple = ()) -> sqlite3.Row:
+    def iter_query(
+        self,
+        query: str,
+        params: tuple = (),
+        batch_size: int = 1000,
+        named_rows: bool = True,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        执行查询操作，按批次逐行返回结果
+
+        与 execute_query 不同，结果集不会一次性全部读入内存
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            batch_size: 每次从游标读取的行数
+            named_rows: 为False时返回普通元组
+
+        Yields:
+            查询结果行
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = self._query_cursor(conn, named_rows)
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield from rows
+        except sqlite3.Error as e:
+            logger.error(f"查询执行错误: {e}, SQL: {query}, Params: {params}")
+            raise
+
+    def execute_query_single(
+        self, query: str, params: tuple = (), named_rows: bool = True
+    ) -> sqlite3.Row:
         """
         执行查询操作，返回单个结果
 
         Args:
             query: SQL查询语句
             params: 查询参数
+            named_rows: 为False时返回普通元组
 
         Returns:
             查询结果，如果没有结果返回None
         """
-        results = self.execute_query(query, params)
-        return results[0] if results else None
+        try:
+            with self.get_connection() as conn:
+                cursor = self._query_cursor(conn, named_rows)
+                # 只取第一行，不把整个结果集读入内存
+                return cursor.execute(query, params).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"查询执行错误: {e}, SQL: {query}, Params: {params}")
+            raise
 
     def execute_update(self, query: str, params: tuple = ()) -> int:
         """
@@ -145,7 +226,10 @@ class CommonDatabase:
                 cursor.execute(query, params)
                 conn.commit()
                 logger.debug(
-                    f"更新执行成功，影响行数: {cursor.rowcount}, SQL: {query}, Params: {params}"
+                    "更新执行成功，影响行数: %s, SQL: %s, Params: %s",
+                    cursor.rowcount,
+                    query,
+                    params,
                 )
                 return cursor.rowcount
         except sqlite3.Error as e:
@@ -168,7 +252,7 @@ class CommonDatabase:
                 cursor = conn.cursor()
                 cursor.executemany(query, params_list)
                 conn.commit()
-                logger.debug(f"批量执行成功，影响行数: {cursor.rowcount}, SQL: {query}")
+                logger.debug("批量执行成功，影响行数: %s, SQL: %s", cursor.rowcount, query)
                 return cursor.rowcount
         except sqlite3.Error as e:
             logger.error(f"批量执行错误: {e}, SQL: {query}")
@@ -6,11 +6,25 @@
 
 import concurrent.futures
 import json
+import sqlite3
+import threading
+from collections.abc import Iterable
 from typing import Any
 
 from astrbot.api import logger
 from .database import CommonDatabase
 
+# 合并写入因数据库被锁定而失败时，整批放回缓冲区重试的最大次数
+_MAX_FLUSH_RETRIES = 3
+
+
+def _is_transient_error(e: Exception) -> bool:
+    """判断是否为数据库被其他连接锁定等稍后重试即可成功的错误"""
+    if not isinstance(e, sqlite3.OperationalError):
+        return False
+    message = str(e)
+    return "locked" in message or "busy" in message
+
 
 class GachaDBOperations:
     """
@@ -30,9 +44,20 @@ class GachaDBOperations:
         # 初始化业务相关的数据库表结构
         self._init_business_tables()
         # 使用线程池进行异步数据库操作，提高响应速度，避免死锁
+        # SQLite 同一时刻只允许一个写事务，单个工作线程即可，同时保证写入按提交顺序执行
         self._db_executor = concurrent.futures.ThreadPoolExecutor(
-            max_workers=2, thread_name_prefix="GachaDB-"
+            max_workers=1, thread_name_prefix="GachaDB-"
         )  # 数据库操作线程池
+        # 各用户最近一次尚未完成的异步写入，读取该用户数据前需等待其完成
+        self._pending_writes: dict[str, concurrent.futures.Future] = {}
+        self._pending_lock = threading.Lock()
+        # 等待写入的抽卡结果，由同一次后台刷新合并在一个事务中写入
+        self._write_buffer: list[
+            tuple[str, dict[str, Any], list[dict[str, Any]]]
+        ] = []
+        self._flush_future: concurrent.futures.Future | None = None
+        # 当前缓冲数据因数据库被锁定已连续重试的次数，只在写入线程中访问
+        self._flush_retries = 0
 
     def _init_business_tables(self):
         """初始化业务相关的数据库表结构"""
@@ -105,11 +130,56 @@ class GachaDBOperations:
     # 用户相关操作
     def create_user(self, user_id: str):
         """创建新用户"""
-        logger.debug(f"创建用户: {user_id}")
+        logger.debug("创建用户: %s", user_id)
         self.db.execute_update(
             "INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,)
         )
 
+    @staticmethod
+    def _write_user_state(cursor, user_id: str, state_data: dict[str, Any]):
+        """在给定游标上写入用户及其抽卡状态，由调用方负责提交事务"""
+        # 使用INSERT OR IGNORE确保用户存在，不会删除旧记录
+        cursor.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO gacha_states 
+            (user_id, pity_5star, pity_4star, _5star_guaranteed, _4star_guaranteed, pull_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            (
+                user_id,
+                state_data["pity_5star"],
+                state_data["pity_4star"],
+                int(state_data["_5star_guaranteed"]),
+                int(state_data["_4star_guaranteed"]),
+                state_data["pull_count"],
+            ),
+        )
+
+    @staticmethod
+    def _write_pull_history(
+        cursor, user_id: str, pull_history_list: list[dict[str, Any]]
+    ):
+        """在给定游标上批量写入抽卡记录，由调用方负责提交事务"""
+        params_list = [
+            (
+                user_id,
+                record["item"],
+                record.get("rarity", ""),  # 从数据中获取稀有度，默认未知
+                record.get("pool_id", ""),  # 从数据中获取卡池ID，默认为空字符串
+                record["pull_time"],
+            )
+            for record in pull_history_list
+        ]
+        cursor.executemany(
+            """
+            INSERT INTO pull_history 
+            (user_id, item, rarity, pool_id, pull_time)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            params_list,
+        )
+
     def save_user_state(self, user_id: str, state_data: dict[str, Any]):
         """
         保存用户抽卡状态
@@ -119,31 +189,12 @@ class GachaDBOperations:
             state_data: 包含用户状态信息的字典
         """
         try:
-            logger.debug(f"保存用户状态: {user_id}, 状态: {state_data}")
-
-            # 使用INSERT OR IGNORE确保用户存在，不会删除旧记录
-            self.db.execute_update(
-                """
-                INSERT OR IGNORE INTO users (user_id) VALUES (?)
-            """,
-                (user_id,),
-            )
-
-            self.db.execute_update(
-                """
-                INSERT OR REPLACE INTO gacha_states 
-                (user_id, pity_5star, pity_4star, _5star_guaranteed, _4star_guaranteed, pull_count)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    user_id,
-                    state_data["pity_5star"],
-                    state_data["pity_4star"],
-                    int(state_data["_5star_guaranteed"]),
-                    int(state_data["_4star_guaranteed"]),
-                    state_data["pull_count"],
-                ),
-            )
+            logger.debug("保存用户状态: %s, 状态: %s", user_id, state_data)
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                self._write_user_state(cursor, user_id, state_data)
+                conn.commit()
         except Exception as e:
             logger.error(f"保存用户状态失败: {user_id}, 错误: {e}")
             raise
@@ -159,7 +210,8 @@ class GachaDBOperations:
             用户状态字典，如果不存在则返回None
         """
         try:
-            logger.debug(f"加载用户状态: {user_id}")
+            logger.debug("加载用户状态: %s", user_id)
+            self._wait_pending_write(user_id)
             row = self.db.execute_query_single(
                 """
                 SELECT pity_5star, pity_4star, _5star_guaranteed, _4star_guaranteed, pull_count
@@ -183,6 +235,50 @@ class GachaDBOperations:
             logger.error(f"加载用户状态失败: {user_id}, 错误: {e}")
             raise
 
+    def load_or_create_user(self, user_id: str) -> dict[str, Any] | None:
+        """
+        确保用户存在并加载其抽卡状态
+
+        在同一个事务中完成用户创建和状态查询，只需提交一次
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            用户状态字典，如果尚未保存过状态则返回None
+        """
+        try:
+            logger.debug("加载或创建用户: %s", user_id)
+            self._wait_pending_write(user_id)
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,)
+                )
+                row = cursor.execute(
+                    """
+                    SELECT pity_5star, pity_4star, _5star_guaranteed, _4star_guaranteed, pull_count
+                    FROM gacha_states
+                    WHERE user_id = ?
+                """,
+                    (user_id,),
+                ).fetchone()
+                conn.commit()
+
+            if not row:
+                return None
+
+            return {
+                "pity_5star": row[0],
+                "pity_4star": row[1],
+                "_5star_guaranteed": bool(row[2]),
+                "_4star_guaranteed": bool(row[3]),
+                "pull_count": row[4],
+            }
+        except Exception as e:
+            logger.error(f"加载或创建用户失败: {user_id}, 错误: {e}")
+            raise
+
     def save_pull_history(self, user_id: str, pull_data: dict[str, Any]):
         """
         保存单次抽卡记录
@@ -192,7 +288,7 @@ class GachaDBOperations:
             pull_data: 抽卡记录数据
         """
         try:
-            logger.debug(f"保存抽卡记录: {user_id}, 物品: {pull_data['item']}")
+            logger.debug("保存抽卡记录: %s, 物品: %s", user_id, pull_data["item"])
             self.db.execute_update(
                 """
                 INSERT INTO pull_history 
@@ -222,34 +318,51 @@ class GachaDBOperations:
             pull_history_list: 抽卡记录列表
         """
         try:
-            logger.debug(f"批量保存抽卡记录: {user_id}, 数量: {len(pull_history_list)}")
-
-            # 确保用户存在
-            self.db.execute_update(
-                "INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,)
+            logger.debug(
+                "批量保存抽卡记录: %s, 数量: %d", user_id, len(pull_history_list)
             )
-
-            params_list = [
-                (
-                    user_id,
-                    record["item"],
-                    record.get("rarity", ""),  # 从数据中获取稀有度，默认未知
-                    record.get("pool_id", ""),  # 从数据中获取卡池ID，默认为空字符串
-                    record["pull_time"],
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                # 确保用户存在
+                cursor.execute(
+                    "INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,)
                 )
-                for record in pull_history_list
-            ]
+                self._write_pull_history(cursor, user_id, pull_history_list)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"批量保存抽卡记录失败: {user_id}, 错误: {e}")
+            raise
 
-            self.db.execute_many(
-                """
-                INSERT INTO pull_history 
-                (user_id, item, rarity, pool_id, pull_time)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                params_list,
+    def save_pull_results(
+        self,
+        user_id: str,
+        state_data: dict[str, Any],
+        pull_history_list: list[dict[str, Any]],
+    ):
+        """
+        在同一个事务中保存用户抽卡状态和抽卡记录
+
+        Args:
+            user_id: 用户ID
+            state_data: 包含用户状态信息的字典
+            pull_history_list: 抽卡记录列表
+        """
+        try:
+            logger.debug(
+                "保存抽卡结果: %s, 状态: %s, 记录数量: %d",
+                user_id,
+                state_data,
+                len(pull_history_list),
             )
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                self._write_user_state(cursor, user_id, state_data)
+                self._write_pull_history(cursor, user_id, pull_history_list)
+                conn.commit()
         except Exception as e:
-            logger.error(f"批量保存抽卡记录失败: {user_id}, 错误: {e}")
+            logger.error(f"保存抽卡结果失败: {user_id}, 错误: {e}")
             raise
 
     def load_pull_history(
@@ -277,6 +390,7 @@ class GachaDBOperations:
             logger.debug(
                 f"加载抽卡历史: {user_id}, 限制: {limit}, 偏移: {offset}, 排序: {order}, 卡池ID: {pool_id}"
             )
+            self._wait_pending_write(user_id)
 
             query = "SELECT id, item, rarity, pool_id, pull_time FROM pull_history WHERE user_id = ?"
             params = [user_id]
@@ -333,6 +447,7 @@ class GachaDBOperations:
         """
         try:
             logger.debug(f"获取抽卡历史总数: {user_id}, 卡池ID: {pool_id}")
+            self._wait_pending_write(user_id)
 
             query = "SELECT COUNT(*) as total FROM pull_history WHERE user_id = ?"
             params = [user_id]
@@ -361,6 +476,7 @@ class GachaDBOperations:
         """
         try:
             logger.debug(f"获取用户统计: {user_id}")
+            self._wait_pending_write(user_id)
 
             # 获取总抽卡次数
             total_pulls_row = self.db.execute_query_single(
@@ -406,6 +522,7 @@ class GachaDBOperations:
         """
         try:
             logger.debug(f"清除用户数据: {user_id}")
+            self._wait_pending_write(user_id)
             # 由于外键约束设置了ON DELETE CASCADE，删除用户会自动删除相关的抽卡状态和历史记录
             self.db.execute_update("DELETE FROM users WHERE user_id = ?", (user_id,))
         except Exception as e:
@@ -453,9 +570,150 @@ class GachaDBOperations:
 
         self._db_executor.submit(save_batch)
 
+    def save_pull_results_async(
+        self,
+        user_id: str,
+        state_data: dict[str, Any],
+        pull_history_list: list[dict[str, Any]],
+    ):
+        """
+        异步保存用户抽卡状态和抽卡记录到数据库
+
+        写入先进入缓冲区，后台刷新时把缓冲区中所有用户的结果合并在一个事务中写入；
+        读取该用户数据的方法会先等待这里提交的写入完成，不会读到旧的保底状态
+
+        Args:
+            user_id: 用户ID
+            state_data: 包含用户状态信息的字典
+            pull_history_list: 抽卡记录列表
+        """
+        with self._pending_lock:
+            self._write_buffer.append((user_id, state_data, pull_history_list))
+            future = self._schedule_flush(user_id)
+        future.add_done_callback(lambda f: self._discard_pending_write(user_id, f))
+
+    def _schedule_flush(self, user_id: str) -> concurrent.futures.Future:
+        """
+        确保有一次待执行的后台刷新，并将其记为该用户最近一次写入
+
+        调用方需持有 _pending_lock
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            会写入该用户缓冲数据的刷新任务
+        """
+        # 尚未开始的刷新会带上缓冲区中的所有写入，只有没有待执行的刷新时才提交新的刷新
+        if self._flush_future is None:
+            self._flush_future = self._db_executor.submit(self._flush_write_buffer)
+        future = self._flush_future
+        self._pending_writes[user_id] = future
+        return future
+
+    def _flush_write_buffer(self):
+        """
+        在后台线程中把缓冲区中的抽卡结果合并写入数据库
+
+        数据库被锁定时把这批数据放回缓冲区头部，异常传递给等待该写入的读取方，
+        读取时会再次刷新，超过重试次数后按其他错误处理；
+        其他错误时逐条在各自的事务中重新写入，只丢弃写入失败的那一条，
+        不影响其他用户的写入
+        """
+        with self._pending_lock:
+            batch, self._write_buffer = self._write_buffer, []
+            self._flush_future = None
+        if not batch:
+            return
+
+        try:
+            self._write_batch(batch)
+            self._flush_retries = 0
+            logger.debug("异步保存抽卡结果成功, 合并写入数量: %d", len(batch))
+            return
+        except Exception as e:
+            if _is_transient_error(e) and self._flush_retries < _MAX_FLUSH_RETRIES:
+                self._flush_retries += 1
+                logger.warning(
+                    f"异步保存抽卡结果时数据库被锁定, 第 {self._flush_retries} 次重试, "
+                    f"合并写入数量: {len(batch)}, 错误: {e}"
+                )
+                # 放回缓冲区头部，保持写入顺序，下次刷新时重试
+                with self._pending_lock:
+                    self._write_buffer[:0] = batch
+                raise
+            logger.error(
+                f"异步保存抽卡结果失败, 合并写入数量: {len(batch)}, 改为逐条写入, 错误: {e}"
+            )
+        self._flush_retries = 0
+
+        for entry in batch:
+            try:
+                self._write_batch((entry,))
+            except Exception as e:
+                logger.error(f"异步保存抽卡结果失败, 丢弃该次写入: {entry[0]}, 错误: {e}")
+
+    def _write_batch(
+        self, batch: Iterable[tuple[str, dict[str, Any], list[dict[str, Any]]]]
+    ) -> None:
+        """
+        在一个事务中按提交顺序写入缓冲的抽卡结果，同一用户的状态以最后一次为准
+
+        Args:
+            batch: (用户ID, 用户状态, 抽卡记录列表) 元组的序列
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for user_id, state_data, pull_history_list in batch:
+                self._write_user_state(cursor, user_id, state_data)
+                self._write_pull_history(cursor, user_id, pull_history_list)
+            conn.commit()
+
+    def _discard_pending_write(self, user_id: str, future: concurrent.futures.Future):
+        """
+        写入成功后移除等待记录，已被更新的写入覆盖时保持不变
+
+        数据库被锁定导致写入失败时保留记录，读取该用户数据时会重试写入，而不是读到旧的状态
+        """
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._pending_lock:
+            if self._pending_writes.get(user_id) is future:
+                del self._pending_writes[user_id]
+
+    def _wait_pending_write(self, user_id: str):
+        """
+        等待该用户尚未完成的异步写入
+
+        写入线程按提交顺序执行，等待最近一次写入即可保证之前的写入都已完成；
+        上次写入因数据库被锁定失败时数据已放回缓冲区，此时重新提交一次刷新并等待，
+        仍然失败则把异常抛给调用方
+
+        Raises:
+            Exception: 该用户的抽卡结果未能写入数据库
+        """
+        future = self._pending_writes.get(user_id)
+        if future is None:
+            return
+        if future.done() and (future.cancelled() or future.exception() is not None):
+            with self._pending_lock:
+                if self._pending_writes.get(user_id) is future:
+                    future = self._schedule_flush(user_id)
+                else:
+                    future = self._pending_writes.get(user_id, future)
+            future.add_done_callback(lambda f: self._discard_pending_write(user_id, f))
+        future.result()
+
     def close(self):
         """
         关闭线程池资源
         """
         logger.info("关闭数据库操作线程池")
         self._db_executor.shutdown(wait=True)
+        # 因数据库被锁定放回缓冲区的数据，关闭前再尝试写入一次
+        if self._write_buffer:
+            try:
+                self._flush_write_buffer()
+            except Exception:
+                logger.error(f"关闭前写入缓冲区失败, 丢弃数量: {len(self._write_buffer)}")
@@ -3,11 +3,125 @@
 负责从数据库加载物品数据并提供物品数据管理功能，包括角色和武器
 """
 
+import re
+import sqlite3
+from collections.abc import Iterator
+from functools import lru_cache
 from typing import Any
 
 from astrbot.api import logger
 from .database import CommonDatabase
 
+# 批量插入时每条多行 INSERT 语句包含的行数
+# 每行 7 个参数，100 行共 700 个参数，低于旧版 SQLite 默认的 999 个变量上限
+_INSERT_CHUNK_SIZE = 100
+
+# 批量删除时每条 DELETE ... IN (...) 语句包含的物品数，低于 999 个变量上限
+_DELETE_CHUNK_SIZE = 900
+
+# 合法的物品表名：仅允许字母、数字、下划线（含 Unicode 文字）
+_TABLE_NAME_PATTERN = re.compile(r"\w+")
+
+# 物品查询缓存的最大条目数
+_QUERY_CACHE_MAXSIZE = 1024
+
+# 本进程内所有 ItemDBOperations 实例对物品表的写操作计数，
+# 同一线程的多个实例共用一个连接时，PRAGMA data_version 无法反映彼此的写入
+_write_generation = 0
+
+# 物品查询返回的列，顺序与 _map_row_to_item 组装的字典一致
+_ITEM_COLUMNS = (
+    "external_id",
+    "name",
+    "rarity",
+    "type",
+    "affiliated_type",
+    "portrait_path",
+    "portrait_url",
+)
+_ITEM_COLUMNS_SQL = ", ".join(_ITEM_COLUMNS)
+
+# 物品表结构
+# unique_id 是 rowid 的别名，不使用 AUTOINCREMENT，避免每次插入都维护 sqlite_sequence
+_CREATE_ITEMS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        unique_id INTEGER PRIMARY KEY,
+        external_id TEXT UNIQUE,
+        name TEXT NOT NULL,
+        rarity TEXT NOT NULL,
+        type TEXT NOT NULL,
+        affiliated_type TEXT,
+        portrait_path TEXT,
+        portrait_url TEXT
+    )
+"""
+
+# 已经是{number}star格式的稀有度，格式化时原样返回
+_CANONICAL_RARITIES = frozenset(("1star", "2star", "3star", "4star", "5star"))
+
+# 常见稀有度输入到{number}star格式的映射
+# 已规范化的稀有度也放入映射，最常见的输入只需一次哈希查找
+_RARITY_MAP = {
+    **{v: f"{v}star" for v in (3, 4, 5, "3", "4", "5")},
+    **{v: v for v in _CANONICAL_RARITIES},
+}
+
+
+def _format_rarity(rarity: Any) -> str:
+    """统一稀有度格式为{number}star
+
+    Args:
+        rarity: 原始稀有度，可以是整数、数字字符串或已格式化的字符串
+
+    Returns:
+        格式化后的稀有度字符串
+    """
+    formatted = _RARITY_MAP.get(rarity)
+    if formatted is not None:
+        return formatted
+    if isinstance(rarity, int):
+        return f"{rarity}star"
+    return str(rarity)
+
+
+# update_item 可更新的字段及其 SET 子句片段
+_UPDATE_SET_FRAGMENTS = {
+    field: f"{field} = ?"
+    for field in (
+        "name",
+        "rarity",
+        "type",
+        "affiliated_type",
+        "portrait_path",
+        "portrait_url",
+    )
+}
+
+# update_item 写入前需要转换的字段
+_UPDATE_TRANSFORMS = {"rarity": _format_rarity}
+
+# 参与生成 external_id 的关键字段，变化时需要重新生成 external_id
+_KEY_FIELDS = ("type", "name", "rarity")
+
+# 添加物品时的必需字段
+_REQUIRED_FIELDS = ("name", "rarity", "type")
+
+
+def _validate_table_name(table_name: str) -> None:
+    """校验物品表名
+
+    表名会直接拼接进 SQL 语句，不能作为参数绑定，因此必须在使用前校验，
+    防止通过配置组名称注入 SQL
+
+    Args:
+        table_name: 物品表名称
+
+    Raises:
+        ValueError: 表名不合法
+    """
+    if not isinstance(table_name, str) or not _TABLE_NAME_PATTERN.fullmatch(table_name):
+        raise ValueError(f"非法的物品表名: {table_name!r}")
+
 
 class ItemDBOperations:
     """
@@ -24,52 +138,226 @@ class ItemDBOperations:
             db: 数据库实例
         """
         self.db = db
+        # 本进程内已完成初始化的表名，避免每次读写都重复执行建表语句
+        self._initialized_tables: set[str] = set()
+        # 已建立名称全文索引的表名，SQLite 不支持 FTS5 trigram 时为空
+        self._fts_tables: set[str] = set()
+        # 物品目录在抽卡过程中基本不变，按 (表名, 查询参数) 缓存查询结果行，
+        # 本实例的写操作会清空缓存，其他实例或连接的写入在读取前通过
+        # _check_query_cache 发现
+        self._cache_stamp: tuple | None = None
+        self._fetch_item_row = lru_cache(maxsize=_QUERY_CACHE_MAXSIZE)(
+            self._query_item_row
+        )
+        self._fetch_item_rows = lru_cache(maxsize=_QUERY_CACHE_MAXSIZE)(
+            self._query_item_rows
+        )
         self._init_tables()
 
+    def _query_item_row(self, table_name: str, item_id: str) -> tuple | None:
+        """查询单个物品行，结果由 _fetch_item_row 缓存"""
+        row = self.db.execute_query_single(
+            f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name} WHERE external_id = ?",
+            (item_id,),
+            named_rows=False,
+        )
+        return row
+
+    def _query_item_rows(
+        self, table_name: str, column: str, value: str
+    ) -> tuple[tuple, ...]:
+        """按单列等值条件查询物品行，结果由 _fetch_item_rows 缓存"""
+        rows = self.db.execute_query(
+            f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name} WHERE {column} = ? ORDER BY unique_id",
+            (value,),
+            named_rows=False,
+        )
+        return tuple(rows)
+
+    def _check_query_cache(self):
+        """
+        读取缓存前确认数据库未被其他实例或连接修改，否则清空查询缓存
+
+        PRAGMA data_version 在其他连接提交后变化，但只在同一连接上可比较，
+        因此连同连接标识和进程内写操作计数一起记录
+        """
+        with self.db.get_connection() as conn:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        stamp = (id(conn), data_version, _write_generation)
+        if stamp != self._cache_stamp:
+            self._fetch_item_row.cache_clear()
+            self._fetch_item_rows.cache_clear()
+            self._cache_stamp = stamp
+
+    def _invalidate_query_cache(self):
+        """物品表发生写操作后清空查询缓存，并通知其他实例的缓存失效"""
+        global _write_generation
+        _write_generation += 1
+        self._fetch_item_row.cache_clear()
+        self._fetch_item_rows.cache_clear()
+
     def _init_tables(self, table_name="items"):
         """初始化物品相关的数据库表结构
 
+        每个表在进程生命周期内只初始化一次，之后的调用直接返回
+
         Args:
             table_name: 物品表名称，默认为'items'
         """
+        if table_name in self._initialized_tables:
+            return
+        _validate_table_name(table_name)
+
         try:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
+                self._ensure_table(cursor, table_name)
+                conn.commit()
 
-                # 创建物品表
-                cursor.execute(f"""
-                    CREATE TABLE IF NOT EXISTS {table_name} (
-                        unique_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        external_id TEXT UNIQUE,
-                        name TEXT NOT NULL,
-                        rarity TEXT NOT NULL,
-                        type TEXT NOT NULL,
-                        affiliated_type TEXT,
-                        portrait_path TEXT,
-                        portrait_url TEXT
-                    )
-                """)
-                logger.debug(f"创建或验证{table_name}表")
+            # 检查是否需要添加默认物品数据
+            # 先导入默认物品再建索引，批量导入时无需逐行维护索引
+            self._add_default_items(table_name)
 
-                # 创建物品表索引
-                cursor.execute(
-                    f"CREATE INDEX IF NOT EXISTS idx_{table_name}_name ON {table_name}(name)"
-                )
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                self._ensure_indexes(cursor, table_name)
+                conn.commit()
+
+            self._initialized_tables.add(table_name)
+        except Exception as e:
+            logger.error(f"初始化物品表失败: {e}")
+            raise
+
+    def _ensure_table(self, cursor, table_name: str):
+        """创建物品表并完成旧版表结构的迁移
+
+        Args:
+            cursor: 数据库游标
+            table_name: 物品表名称
+        """
+        # 创建物品表
+        cursor.execute(_CREATE_ITEMS_TABLE_SQL.format(table_name=table_name))
+        logger.debug(f"创建或验证{table_name}表")
+
+        # 检查并添加 portrait_url 字段（兼容旧数据库）
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        columns = [column[1] for column in cursor.fetchall()]
+        if "portrait_url" not in columns:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN portrait_url TEXT")
+            logger.debug(f"为{table_name}表添加portrait_url字段")
+
+        # 旧版物品表使用 AUTOINCREMENT，每次插入都要维护 sqlite_sequence，
+        # 这里重建为普通的 rowid 主键表，保留原有 unique_id 及插入顺序
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table_name,),
+        )
+        row = cursor.fetchone()
+        if row and "AUTOINCREMENT" in row[0].upper():
+            old_table_name = f"{table_name}__old"
+            # DDL 默认自动提交，显式开启事务让改名、建表、复制和删除一起提交，
+            # 中途失败时整体回滚，数据不会滞留在旧表中
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(f"ALTER TABLE {table_name} RENAME TO {old_table_name}")
+                cursor.execute(_CREATE_ITEMS_TABLE_SQL.format(table_name=table_name))
                 cursor.execute(
-                    f"CREATE INDEX IF NOT EXISTS idx_{table_name}_rarity ON {table_name}(rarity)"
+                    f"INSERT INTO {table_name} (unique_id, {_ITEM_COLUMNS_SQL}) "
+                    f"SELECT unique_id, {_ITEM_COLUMNS_SQL} FROM {old_table_name}"
                 )
+                cursor.execute(f"DROP TABLE {old_table_name}")
+                cursor.connection.commit()
+            except BaseException:
+                cursor.connection.rollback()
+                raise
+            logger.debug(f"重建{table_name}表，移除AUTOINCREMENT")
+
+    def _ensure_indexes(self, cursor, table_name: str):
+        """创建物品表的索引和名称全文索引
+
+        Args:
+            cursor: 数据库游标
+            table_name: 物品表名称
+        """
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table_name}_name ON {table_name}(name)"
+        )
+        # 复合索引同时覆盖按稀有度、稀有度+类型筛选及其后的 ORDER BY unique_id
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table_name}_rarity_type ON {table_name}(rarity, type, unique_id)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table_name}_type ON {table_name}(type, unique_id)"
+        )
+        # 单列稀有度索引已被复合索引的前缀取代
+        cursor.execute(f"DROP INDEX IF EXISTS idx_{table_name}_rarity")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table_name}_external_id ON {table_name}(external_id)"
+        )
+        logger.debug(f"创建{table_name}表索引")
+
+        # 创建名称全文索引
+        self._init_fts_table(cursor, table_name)
+
+    def _init_fts_table(self, cursor, table_name: str):
+        """为物品表创建名称全文索引
+
+        使用 FTS5 trigram 分词器的外部内容表，支持任意位置的子串匹配，
+        并通过触发器与物品表保持同步。SQLite 不支持时回退为 LIKE 搜索
+
+        Args:
+            cursor: 数据库游标
+            table_name: 物品表名称
+        """
+        fts_table = f"{table_name}_fts"
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (fts_table,),
+        )
+        if cursor.fetchone() is None:
+            try:
                 cursor.execute(
-                    f"CREATE INDEX IF NOT EXISTS idx_{table_name}_external_id ON {table_name}(external_id)"
+                    f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+                    f"name, content='{table_name}', content_rowid='unique_id', "
+                    f"tokenize='trigram')"
                 )
-                logger.debug(f"创建{table_name}表索引")
+            except sqlite3.OperationalError as e:
+                logger.debug(f"当前SQLite不支持FTS5 trigram，{table_name}表使用LIKE搜索: {e}")
+                return
+            # 为已有数据建立索引
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            logger.debug(f"创建{fts_table}全文索引表")
 
-                conn.commit()
+        self._create_fts_triggers(cursor, table_name)
+        self._fts_tables.add(table_name)
 
-            # 检查是否需要添加默认物品数据
-            self._add_default_items(table_name)
-        except Exception as e:
-            logger.error(f"初始化物品表失败: {e}")
-            raise
+    @staticmethod
+    def _create_fts_triggers(cursor, table_name: str):
+        """创建使名称全文索引与物品表保持同步的触发器
+
+        Args:
+            cursor: 数据库游标
+            table_name: 物品表名称
+        """
+        fts_table = f"{table_name}_fts"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table_name} BEGIN
+                INSERT INTO {fts_table}(rowid, name) VALUES (new.unique_id, new.name);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table_name} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, name)
+                VALUES ('delete', old.unique_id, old.name);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF name ON {table_name} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, name)
+                VALUES ('delete', old.unique_id, old.name);
+                INSERT INTO {fts_table}(rowid, name) VALUES (new.unique_id, new.name);
+            END
+        """)
 
     def _add_default_items(self, table_name="items"):
         """添加默认物品数据到数据库
@@ -79,11 +367,8 @@ class ItemDBOperations:
         """
         try:
             # 检查表中是否已有数据
-            item_count = self.get_items_count(table_name)
-            if item_count > 0:
-                logger.debug(
-                    f"{table_name}表中已有{item_count}个物品，跳过添加默认物品"
-                )
+            if self.has_items(table_name):
+                logger.debug(f"{table_name}表中已有物品，跳过添加默认物品")
                 return
 
             logger.info(f"{table_name}表为空，开始添加默认物品数据")
@@ -154,25 +439,13 @@ class ItemDBOperations:
         将数据库行映射为物品字典
 
         Args:
-            row: 数据库查询结果行
+            row: 以 _ITEM_COLUMNS_SQL 选列的数据库查询结果行（普通元组）
 
         Returns:
             物品字典
         """
-        # 处理portrait_url字段，兼容旧数据库
-        portrait_url = ""
-        if "portrait_url" in row.keys():
-            portrait_url = row["portrait_url"]
-
-        return {
-            "external_id": row["external_id"],
-            "name": row["name"],
-            "rarity": row["rarity"],
-            "type": row["type"],
-            "affiliated_type": row["affiliated_type"],
-            "portrait_path": row["portrait_path"],
-            "portrait_url": portrait_url,
-        }
+        # 查询语句按 _ITEM_COLUMNS 的顺序选列，直接按位置组装
+        return dict(zip(_ITEM_COLUMNS, row))
 
     def load_all_items(self, table_name="items") -> dict[str, dict[str, Any]]:
         """
@@ -184,18 +457,18 @@ class ItemDBOperations:
         Returns:
             包含所有物品信息的字典，键为物品ID
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"加载{table_name}表的所有物品")
             # 在查询前先初始化表，确保表存在
             self._init_tables(table_name)
             rows = self.db.execute_query(
-                f"SELECT * FROM {table_name} ORDER BY unique_id"
+                f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name} ORDER BY unique_id",
+                named_rows=False,
             )
-
-            items = {}
-            for row in rows:
-                item_id = row["external_id"]
-                items[item_id] = self._map_row_to_item(row)
+            # 单个字典推导式内联行映射，省去逐行的生成器切换和方法调用；
+            # external_id 是 _ITEM_COLUMNS 的第一列
+            items = {row[0]: dict(zip(_ITEM_COLUMNS, row)) for row in rows}
 
             logger.debug(f"成功加载 {len(items)} 个物品")
             return items
@@ -203,6 +476,27 @@ class ItemDBOperations:
             logger.error(f"加载所有物品失败: {e}")
             raise
 
+    def iter_items(self, table_name="items") -> Iterator[dict[str, Any]]:
+        """
+        逐个遍历物品表中的所有物品
+
+        结果按 unique_id 排序，分批从数据库读取，适合只需遍历一次的大表
+
+        Args:
+            table_name: 物品表名称，默认为'items'
+
+        Yields:
+            物品字典
+        """
+        _validate_table_name(table_name)
+        # 在查询前先初始化表，确保表存在
+        self._init_tables(table_name)
+        for row in self.db.iter_query(
+            f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name} ORDER BY unique_id",
+            named_rows=False,
+        ):
+            yield self._map_row_to_item(row)
+
     def get_item_by_id(
         self, item_id: str, table_name="items"
     ) -> dict[str, Any] | None:
@@ -216,13 +510,13 @@ class ItemDBOperations:
         Returns:
             物品详细信息字典，如果不存在则返回None
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"根据ID获取物品: {item_id}, 表: {table_name}")
             # 在查询前先初始化表，确保表存在
             self._init_tables(table_name)
-            row = self.db.execute_query_single(
-                f"SELECT * FROM {table_name} WHERE external_id = ?", (item_id,)
-            )
+            self._check_query_cache()
+            row = self._fetch_item_row(table_name, item_id)
             return self._map_row_to_item(row) if row else None
         except Exception as e:
             logger.error(f"获取物品失败: {item_id}, 表: {table_name}, 错误: {e}")
@@ -239,15 +533,16 @@ class ItemDBOperations:
         Returns:
             如果物品存在返回True，否则返回False
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"检查物品是否存在: {item_id}, 表: {table_name}")
             # 在查询前先初始化表，确保表存在
             self._init_tables(table_name)
             row = self.db.execute_query_single(
-                f"SELECT COUNT(*) as count FROM {table_name} WHERE external_id = ?",
+                f"SELECT 1 FROM {table_name} WHERE external_id = ? LIMIT 1",
                 (item_id,),
             )
-            return row["count"] > 0 if row else False
+            return row is not None
         except Exception as e:
             logger.error(f"检查物品存在性失败: {item_id}, 表: {table_name}, 错误: {e}")
             raise
@@ -289,9 +584,10 @@ class ItemDBOperations:
         Returns:
             成功返回True，失败返回False
         """
+        _validate_table_name(table_name)
 
-        required_fields = {"name", "rarity", "type"}
-        missing_fields = required_fields - set(item_data.keys())
+        required_fields = ("name", "rarity", "type")
+        missing_fields = [f for f in required_fields if f not in item_data]
         if missing_fields:
             raise ValueError(f"缺少必需字段: {missing_fields}")
 
@@ -304,15 +600,6 @@ class ItemDBOperations:
                 f"添加物品: {item_data['name']}, 表: {table_name}, external_id: {item_data['external_id']}"
             )
 
-            # 统一稀有度格式为{number}star
-            rarity = item_data["rarity"]
-            if isinstance(rarity, int):
-                formatted_rarity = f"{rarity}star"
-            elif rarity in ("3", "4", "5"):
-                formatted_rarity = f"{rarity}star"
-            else:
-                formatted_rarity = str(rarity)
-
             result = self.db.execute_update(
                 f"""
                 INSERT INTO {table_name} 
@@ -322,13 +609,14 @@ class ItemDBOperations:
                 (
                     item_data["external_id"],
                     item_data["name"],
-                    formatted_rarity,
+                    _format_rarity(item_data["rarity"]),
                     item_data["type"],
                     item_data.get("affiliated_type", ""),
                     item_data.get("portrait_path", ""),
                     item_data.get("portrait_url", ""),
                 ),
             )
+            self._invalidate_query_cache()
             return result >= 0
         except Exception as e:
             logger.error(
@@ -336,6 +624,93 @@ class ItemDBOperations:
             )
             return False
 
+    def _build_item_params(self, items_data: list[dict[str, Any]]) -> list[tuple]:
+        """
+        将物品数据转换为插入语句的参数列表，缺少 external_id 的物品会自动生成
+
+        生成的 external_id 在所有物品校验通过后才写回物品数据，
+        校验失败时不会修改任何传入的物品数据
+
+        Args:
+            items_data: 包含多个物品信息字典的列表
+
+        Returns:
+            按 _ITEM_COLUMNS 顺序排列的参数元组列表
+
+        Raises:
+            ValueError: 物品缺少 name、rarity 或 type 字段
+        """
+        params_list = []
+        generated_ids = []
+        for item in items_data:
+            if not all(field in item for field in _REQUIRED_FIELDS):
+                missing_fields = [field for field in _REQUIRED_FIELDS if field not in item]
+                raise ValueError(
+                    f"缺少必需字段: {missing_fields} 物品: {item.get('name', '未知')}"
+                )
+
+            # 自动生成 external_id（如果未提供）
+            external_id = item.get("external_id")
+            if not external_id:
+                external_id = self._generate_default_external_id(item)
+                generated_ids.append((item, external_id))
+
+            params_list.append(
+                (
+                    external_id,
+                    item["name"],
+                    _format_rarity(item["rarity"]),
+                    item["type"],
+                    item.get("affiliated_type", ""),
+                    item.get("portrait_path", ""),
+                    item.get("portrait_url", ""),
+                )
+            )
+
+        for item, external_id in generated_ids:
+            item["external_id"] = external_id
+        return params_list
+
+    def _insert_item_rows(
+        self, cursor, table_name: str, params_list: list[tuple]
+    ) -> int:
+        """
+        在调用方的事务中批量插入物品行
+
+        Args:
+            cursor: 数据库游标
+            table_name: 物品表名称
+            params_list: 由 _build_item_params 生成的参数列表
+
+        Returns:
+            插入的行数
+        """
+        insert_sql = f"""
+            INSERT INTO {table_name} 
+            (external_id, name, rarity, type, affiliated_type, portrait_path, portrait_url) 
+            VALUES """
+        row_placeholder = "(?, ?, ?, ?, ?, ?, ?)"
+        # 整块部分使用多行 VALUES，每条语句插入 _INSERT_CHUNK_SIZE 行
+        full_count = len(params_list) - len(params_list) % _INSERT_CHUNK_SIZE
+        chunk_sql = insert_sql + ", ".join([row_placeholder] * _INSERT_CHUNK_SIZE)
+
+        result = 0
+        for start in range(0, full_count, _INSERT_CHUNK_SIZE):
+            cursor.execute(
+                chunk_sql,
+                [
+                    value
+                    for params in params_list[start : start + _INSERT_CHUNK_SIZE]
+                    for value in params
+                ],
+            )
+            result += cursor.rowcount
+        # 剩余不足一块的行使用单行语句
+        if full_count < len(params_list):
+            cursor.executemany(insert_sql + row_placeholder, params_list[full_count:])
+            result += cursor.rowcount
+        return result
+
     def add_items_batch(
         self, items_data: list[dict[str, Any]], table_name="items"
     ) -> bool:
@@ -349,62 +724,78 @@ class ItemDBOperations:
         Returns:
             成功返回True，失败返回False
         """
+        _validate_table_name(table_name)
         if not items_data:
             logger.debug("没有物品需要添加")
             return True
 
-        required_fields = {"name", "rarity", "type"}
-        for item_data in items_data:
-            missing_fields = required_fields - set(item_data.keys())
-            if missing_fields:
-                raise ValueError(
-                    f"缺少必需字段: {missing_fields} 物品: {item_data.get('name', '未知')}"
-                )
+        params_list = self._build_item_params(items_data)
 
         try:
             logger.debug(f"批量添加 {len(items_data)} 个物品到表: {table_name}")
-            params_list = []
-
-            for item in items_data:
-                # 自动生成 external_id（如果未提供）
-                if "external_id" not in item or not item["external_id"]:
-                    item["external_id"] = self._generate_default_external_id(item)
-
-                # 统一稀有度格式为{number}star
-                rarity = item["rarity"]
-                if isinstance(rarity, int):
-                    formatted_rarity = f"{rarity}star"
-                elif rarity in ("3", "4", "5"):
-                    formatted_rarity = f"{rarity}star"
-                else:
-                    formatted_rarity = str(rarity)
-
-                params_list.append(
-                    (
-                        item["external_id"],
-                        item["name"],
-                        formatted_rarity,
-                        item["type"],
-                        item.get("affiliated_type", ""),
-                        item.get("portrait_path", ""),
-                        item.get("portrait_url", ""),
-                    )
-                )
 
-            result = self.db.execute_many(
-                f"""
-                INSERT INTO {table_name} 
-                (external_id, name, rarity, type, affiliated_type, portrait_path, portrait_url) 
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-                params_list,
-            )
+            # 在同一连接上显式开启写事务，所有行只提交一次
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                result = self._insert_item_rows(cursor, table_name, params_list)
+                conn.commit()
+            self._invalidate_query_cache()
             logger.debug(f"成功添加 {result} 个物品")
             return result >= 0
         except Exception as e:
             logger.error(f"批量添加物品失败: {table_name}, 错误: {e}")
             return False
 
+    def replace_items(
+        self, items_data: list[dict[str, Any]], table_name="items"
+    ) -> bool:
+        """
+        用给定的物品列表整体替换物品表中的数据
+
+        在影子表中写入全部物品并建好索引后再替换原表，整个过程只提交一次，
+        并发读取方不会看到表被清空的中间状态
+
+        Args:
+            items_data: 包含多个物品信息字典的列表
+            table_name: 物品表名称，默认为'items'
+
+        Returns:
+            成功返回True，失败返回False
+        """
+        _validate_table_name(table_name)
+
+        params_list = self._build_item_params(items_data)
+
+        try:
+            logger.debug(f"替换{table_name}表中的物品，共 {len(items_data)} 个")
+            # 确保原表已存在并完成旧版结构迁移
+            self._init_tables(table_name)
+            new_table_name = f"{table_name}__new"
+
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(f"DROP TABLE IF EXISTS {new_table_name}")
+                cursor.execute(
+                    _CREATE_ITEMS_TABLE_SQL.format(table_name=new_table_name)
+                )
+                result = self._insert_item_rows(cursor, new_table_name, params_list)
+
+                # 删除原表会一并删除其索引和全文索引触发器，全文索引表随后重建
+                cursor.execute(f"DROP TABLE {table_name}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}_fts")
+                cursor.execute(f"ALTER TABLE {new_table_name} RENAME TO {table_name}")
+                self._fts_tables.discard(table_name)
+                self._ensure_indexes(cursor, table_name)
+                conn.commit()
+            self._invalidate_query_cache()
+            logger.debug(f"成功替换{table_name}表，写入 {result} 个物品")
+            return result >= 0
+        except Exception as e:
+            logger.error(f"替换物品失败: {table_name}, 错误: {e}")
+            return False
+
     def update_item(
         self,
         item_id: str,
@@ -426,6 +817,7 @@ class ItemDBOperations:
         Returns:
             成功返回True，失败返回False
         """
+        _validate_table_name(table_name)
         if not update_data:
             logger.debug(f"没有更新数据，跳过更新: {item_id}")
             return True
@@ -438,40 +830,25 @@ class ItemDBOperations:
                 return False
 
             # 检查关键属性是否发生变化
-            key_fields = ["type", "name", "rarity"]
             key_changed = any(
                 update_data.get(field) is not None
                 and str(update_data[field]) != str(current_item[field])
-                for field in key_fields
+                for field in _KEY_FIELDS
             )
 
-            # 构建动态更新语句
-            valid_fields = [
-                "name",
-                "rarity",
-                "type",
-                "affiliated_type",
-                "portrait_path",
-                "portrait_url",
+            # 构建动态更新语句，字段片段和值转换均查表获得
+            fields = [
+                _UPDATE_SET_FRAGMENTS[field]
+                for field in update_data
+                if field in _UPDATE_SET_FRAGMENTS
+            ]
+            values = [
+                _UPDATE_TRANSFORMS[field](value)
+                if field in _UPDATE_TRANSFORMS
+                else value
+                for field, value in update_data.items()
+                if field in _UPDATE_SET_FRAGMENTS
             ]
-            fields = []
-            values = []
-
-            for field, value in update_data.items():
-                if field in valid_fields:
-                    # 统一稀有度格式为{number}star
-                    if field == "rarity":
-                        rarity = value
-                        if isinstance(rarity, int):
-                            formatted_rarity = f"{rarity}star"
-                        elif rarity in ("3", "4", "5"):
-                            formatted_rarity = f"{rarity}star"
-                        else:
-                            formatted_rarity = str(rarity)
-                        values.append(formatted_rarity)
-                    else:
-                        values.append(value)
-                    fields.append(f"{field} = ?")
 
             # 如果关键属性发生变化，需要重新生成external_id
             if key_changed:
@@ -480,13 +857,7 @@ class ItemDBOperations:
                 updated_data.update(update_data)
                 # 统一稀有度格式
                 if "rarity" in updated_data:
-                    rarity = updated_data["rarity"]
-                    if isinstance(rarity, int):
-                        updated_data["rarity"] = f"{rarity}star"
-                    elif rarity in ("3", "4", "5"):
-                        updated_data["rarity"] = f"{rarity}star"
-                    else:
-                        updated_data["rarity"] = str(rarity)
+                    updated_data["rarity"] = _format_rarity(updated_data["rarity"])
                 # 生成新的external_id
                 new_external_id = self._generate_default_external_id(updated_data)
                 fields.append("external_id = ?")
@@ -503,6 +874,7 @@ class ItemDBOperations:
                 f"UPDATE {table_name} SET {set_clause} WHERE external_id = ?",
                 tuple(values),
             )
+            self._invalidate_query_cache()
             logger.debug(f"成功更新 {result} 个物品")
 
             # 如果需要更新配置文件且物品更新成功
@@ -550,14 +922,15 @@ class ItemDBOperations:
                 f"开始更新配置文件中的物品引用: {old_external_id} -> {new_external_id}"
             )
 
-            # 获取所有配置
-            all_configs = config_manager._configs.values()
+            # 获取所有配置，替换配置时会写回 _configs，这里先取快照
+            all_configs = list(config_manager._configs.values())
 
             for config in all_configs:
                 # 检查是否需要更新此配置
                 config_updated = False
 
-                # 更新included_item_ids
+                # 更新included_item_ids，构造新字典，不修改内存中的原配置
+                included_item_ids = {}
                 for rarity, item_ids in config.included_item_ids.items():
                     updated_ids = []
                     for item_id in item_ids:
@@ -566,9 +939,10 @@ class ItemDBOperations:
                             config_updated = True
                         else:
                             updated_ids.append(item_id)
-                    config.included_item_ids[rarity] = updated_ids
+                    included_item_ids[rarity] = updated_ids
 
                 # 更新rate_up_item_ids
+                rate_up_item_ids = {}
                 for rarity, item_ids in config.rate_up_item_ids.items():
                     updated_ids = []
                     for item_id in item_ids:
@@ -577,25 +951,48 @@ class ItemDBOperations:
                             config_updated = True
                         else:
                             updated_ids.append(item_id)
-                    config.rate_up_item_ids[rarity] = updated_ids
+                    rate_up_item_ids[rarity] = updated_ids
 
-                # 如果配置被更新，保存到文件
+                # 如果配置被更新，替换内存中的配置并保存到文件
                 if config_updated:
-                    # 找到配置对应的文件路径
-                    file_path = None
-                    for path, cp_id in config_manager._file_path_to_cp_id.items():
-                        if cp_id == config.cp_id:
-                            file_path = path
-                            break
-
-                    if file_path:
-                        config_manager._save_config(file_path, config)
-                        logger.debug(f"更新配置文件: {file_path}")
+                    self._replace_config_item_ids(
+                        config_manager, config, included_item_ids, rate_up_item_ids
+                    )
 
             logger.debug("完成更新配置文件中的物品引用")
         except Exception as e:
             logger.error(f"更新配置文件中的物品引用失败: {e}")
 
+    @staticmethod
+    def _replace_config_item_ids(
+        config_manager,
+        config,
+        included_item_ids: dict[str, Any],
+        rate_up_item_ids: dict[str, Any],
+    ) -> None:
+        """
+        用新的物品ID配置构造卡池配置，保存到文件并替换内存中的配置
+
+        抽卡时按配置实例缓存卡池视图和概率表，配置只能整体替换，不能原地修改
+
+        Args:
+            config_manager: 卡池配置管理器实例
+            config: 原卡池配置
+            included_item_ids: 新的包含物品配置
+            rate_up_item_ids: 新的UP物品配置
+        """
+        config_dict = config.to_dict()
+        config_dict["included_item_ids"] = included_item_ids
+        config_dict["rate_up_item_ids"] = rate_up_item_ids
+        new_config = type(config).from_dict(config_dict)
+
+        # 找到配置对应的文件路径
+        file_path = config_manager.get_config_file_path(config.cp_id)
+        if file_path:
+            config_manager._save_config(file_path, new_config)
+            logger.debug(f"更新配置文件: {file_path}")
+        config_manager._set_config(new_config)
+
     def _remove_item_from_configs(
         self, item_id: str, external_id: str, config_manager
     ) -> None:
@@ -610,39 +1007,34 @@ class ItemDBOperations:
         try:
             logger.debug(f"开始从配置文件中移除物品引用: {external_id}")
 
-            # 获取所有配置
-            all_configs = config_manager._configs.values()
+            # 获取所有配置，替换配置时会写回 _configs，这里先取快照
+            all_configs = list(config_manager._configs.values())
 
             for config in all_configs:
                 # 检查是否需要更新此配置
                 config_updated = False
 
-                # 从included_item_ids中移除
+                # 从included_item_ids中移除，构造新字典，不修改内存中的原配置
+                included_item_ids = {}
                 for rarity, item_ids in config.included_item_ids.items():
                     updated_ids = [id for id in item_ids if id != external_id]
                     if len(updated_ids) != len(item_ids):
-                        config.included_item_ids[rarity] = updated_ids
                         config_updated = True
+                    included_item_ids[rarity] = updated_ids
 
                 # 从rate_up_item_ids中移除
+                rate_up_item_ids = {}
                 for rarity, item_ids in config.rate_up_item_ids.items():
                     updated_ids = [id for id in item_ids if id != external_id]
                     if len(updated_ids) != len(item_ids):
-                        config.rate_up_item_ids[rarity] = updated_ids
                         config_updated = True
+                    rate_up_item_ids[rarity] = updated_ids
 
-                # 如果配置被更新，保存到文件
+                # 如果配置被更新，替换内存中的配置并保存到文件
                 if config_updated:
-                    # 找到配置对应的文件路径
-                    file_path = None
-                    for path, cp_id in config_manager._file_path_to_cp_id.items():
-                        if cp_id == config.cp_id:
-                            file_path = path
-                            break
-
-                    if file_path:
-                        config_manager._save_config(file_path, config)
-                        logger.debug(f"更新配置文件: {file_path}")
+                    self._replace_config_item_ids(
+                        config_manager, config, included_item_ids, rate_up_item_ids
+                    )
 
             logger.debug("完成从配置文件中移除物品引用")
         except Exception as e:
@@ -667,6 +1059,7 @@ class ItemDBOperations:
         Returns:
             成功返回True，失败返回False
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"删除物品: {item_id}, 表: {table_name}")
 
@@ -680,6 +1073,7 @@ class ItemDBOperations:
             result = self.db.execute_update(
                 f"DELETE FROM {table_name} WHERE external_id = ?", (item_id,)
             )
+            self._invalidate_query_cache()
             logger.debug(f"成功删除 {result} 个物品")
 
             # 如果需要更新配置文件且物品删除成功
@@ -703,17 +1097,29 @@ class ItemDBOperations:
         Returns:
             成功返回True，失败返回False
         """
+        _validate_table_name(table_name)
         if not item_ids:
             logger.debug("没有物品需要删除")
             return True
 
         try:
             logger.debug(f"批量删除 {len(item_ids)} 个物品，表: {table_name}")
-            # 构建参数列表
-            params_list = [(item_id,) for item_id in item_ids]
-            result = self.db.execute_many(
-                f"DELETE FROM {table_name} WHERE external_id = ?", params_list
-            )
+            # 在同一连接上显式开启写事务，所有行只提交一次
+            # 每条语句用 IN 列表删除最多 _DELETE_CHUNK_SIZE 个物品
+            result = 0
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                for start in range(0, len(item_ids), _DELETE_CHUNK_SIZE):
+                    chunk = item_ids[start : start + _DELETE_CHUNK_SIZE]
+                    placeholders = ", ".join(["?"] * len(chunk))
+                    cursor.execute(
+                        f"DELETE FROM {table_name} WHERE external_id IN ({placeholders})",
+                        chunk,
+                    )
+                    result += cursor.rowcount
+                conn.commit()
+            self._invalidate_query_cache()
             logger.debug(f"成功删除 {result} 个物品")
             return result >= 0
         except Exception as e:
@@ -733,12 +1139,11 @@ class ItemDBOperations:
         Returns:
             符合条件的物品列表
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"根据稀有度获取物品: {rarity}, 表: {table_name}")
-            rows = self.db.execute_query(
-                f"SELECT * FROM {table_name} WHERE rarity = ? ORDER BY unique_id",
-                (rarity,),
-            )
+            self._check_query_cache()
+            rows = self._fetch_item_rows(table_name, "rarity", rarity)
 
             items = [self._map_row_to_item(row) for row in rows]
             logger.debug(f"找到 {len(items)} 个稀有度为 {rarity} 的物品")
@@ -762,12 +1167,11 @@ class ItemDBOperations:
         Returns:
             符合条件的物品列表
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"根据类型获取物品: {item_type}, 表: {table_name}")
-            rows = self.db.execute_query(
-                f"SELECT * FROM {table_name} WHERE type = ? ORDER BY unique_id",
-                (item_type,),
-            )
+            self._check_query_cache()
+            rows = self._fetch_item_rows(table_name, "type", item_type)
 
             items = [self._map_row_to_item(row) for row in rows]
             logger.debug(f"找到 {len(items)} 个类型为 {item_type} 的物品")
@@ -792,12 +1196,32 @@ class ItemDBOperations:
         Returns:
             匹配的物品列表
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"搜索物品: {name}, 表: {table_name}")
-            rows = self.db.execute_query(
-                f"SELECT * FROM {table_name} WHERE name LIKE ? ORDER BY unique_id LIMIT ?",
-                (f"%{name}%", limit),
-            )
+            self._init_tables(table_name)
+            # trigram 全文索引只能匹配不少于3个字符的子串，更短的关键词仍使用 LIKE
+            if table_name in self._fts_tables and len(name) >= 3:
+                # 作为短语查询，避免关键词中的字符被解析为 FTS 语法
+                phrase = '"' + name.replace('"', '""') + '"'
+                rows = self.db.execute_query(
+                    f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name} WHERE unique_id IN "
+                    f"(SELECT rowid FROM {table_name}_fts WHERE {table_name}_fts MATCH ?) "
+                    f"ORDER BY unique_id LIMIT ?",
+                    (phrase, limit),
+                    named_rows=False,
+                )
+            else:
+                # 转义 LIKE 通配符，与全文索引路径一样按字面匹配 % 和 _
+                pattern = (
+                    name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                )
+                rows = self.db.execute_query(
+                    f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name} "
+                    f"WHERE name LIKE ? ESCAPE '\\' ORDER BY unique_id LIMIT ?",
+                    (f"%{pattern}%", limit),
+                    named_rows=False,
+                )
 
             items = [self._map_row_to_item(row) for row in rows]
             logger.debug(f"找到 {len(items)} 个匹配的物品")
@@ -819,6 +1243,7 @@ class ItemDBOperations:
         Returns:
             符合条件的物品列表
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"根据条件筛选物品: {filters}, 表: {table_name}")
 
@@ -834,12 +1259,12 @@ class ItemDBOperations:
                 conditions.append("type = ?")
                 params.append(filters["type"])
 
-            query = f"SELECT * FROM {table_name}"
+            query = f"SELECT {_ITEM_COLUMNS_SQL} FROM {table_name}"
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
             query += " ORDER BY unique_id"
 
-            rows = self.db.execute_query(query, tuple(params))
+            rows = self.db.execute_query(query, tuple(params), named_rows=False)
 
             items = [self._map_row_to_item(row) for row in rows]
             logger.debug(f"找到 {len(items)} 个符合条件的物品")
@@ -858,6 +1283,7 @@ class ItemDBOperations:
         Returns:
             物品总数
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"获取{table_name}表的物品总数")
             row = self.db.execute_query_single(
@@ -870,6 +1296,24 @@ class ItemDBOperations:
             logger.error(f"获取物品总数失败: {table_name}, 错误: {e}")
             raise
 
+    def has_items(self, table_name="items") -> bool:
+        """
+        检查物品表中是否存在任意物品
+
+        Args:
+            table_name: 物品表名称，默认为'items'
+
+        Returns:
+            表中至少有一个物品返回True，否则返回False
+        """
+        _validate_table_name(table_name)
+        try:
+            row = self.db.execute_query_single(f"SELECT 1 FROM {table_name} LIMIT 1")
+            return row is not None
+        except Exception as e:
+            logger.error(f"检查物品表是否为空失败: {table_name}, 错误: {e}")
+            raise
+
     def clear_table(self, table_name="items") -> bool:
         """
         清空物品表中的所有数据
@@ -880,61 +1324,58 @@ class ItemDBOperations:
         Returns:
             成功返回True，失败返回False
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"清空{table_name}表中的所有数据")
-            # SQLite不支持TRUNCATE，直接使用DELETE FROM并重置自增计数器
+            # SQLite不支持TRUNCATE，直接使用不带WHERE的DELETE FROM，
+            # 表上有触发器时SQLite会逐行删除，因此先移除全文索引的删除触发器，
+            # 让DELETE走截断优化整体释放数据页，再用 'delete-all' 一次清空全文索引
+            # 物品表不使用AUTOINCREMENT，表清空后rowid会自动从1开始，无需重置计数器
+            fts_table = f"{table_name}_fts"
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
-
-                # 删除所有数据
-                cursor.execute(f"DELETE FROM {table_name}")
-                # 重置SQLite自增计数器
-                cursor.execute(
-                    "DELETE FROM sqlite_sequence WHERE name = ?", (table_name,)
-                )
-                conn.commit()
-            logger.debug(f"使用DELETE方式清空{table_name}表并重置自增计数器")
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (fts_table,),
+                    )
+                    has_fts = cursor.fetchone() is not None
+                    if has_fts:
+                        cursor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_ad")
+
+                    # 删除所有数据
+                    cursor.execute(f"DELETE FROM {table_name}")
+
+                    if has_fts:
+                        cursor.execute(
+                            f"INSERT INTO {fts_table}({fts_table}) VALUES ('delete-all')"
+                        )
+                        self._create_fts_triggers(cursor, table_name)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+            self._invalidate_query_cache()
+            logger.debug(f"使用DELETE方式清空{table_name}表")
             return True
         except Exception as e:
             logger.error(f"清空表失败: {table_name}, 错误: {e}")
             return False
 
-    def clear_table_with_transaction(self, table_name="items") -> bool:  # type: ignore[attr-defined]
+    def clear_table_with_transaction(self, table_name="items") -> bool:
         """
         使用事务清空物品表中的所有数据，确保原子性操作
 
+        单条 DELETE 语句本身就是原子的，直接复用 clear_table
+
         Args:
             table_name: 物品表名称，默认为'items'
 
         Returns:
             成功返回True，失败返回False
         """
-        try:
-            logger.debug(f"使用事务清空{table_name}表")
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
-
-                # 开始事务
-                cursor.execute("BEGIN TRANSACTION")
-
-                # 删除所有数据
-                cursor.execute(f"DELETE FROM {table_name}")
-
-                # 重置SQLite自增计数器
-                cursor.execute(
-                    "DELETE FROM sqlite_sequence WHERE name = ?", (table_name,)
-                )
-
-                # 提交事务
-                conn.commit()
-
-                logger.debug(
-                    f"成功清空{table_name}表，删除了所有数据并重置了自增计数器"
-                )
-                return True
-        except Exception as e:
-            logger.error(f"清空表失败: {table_name}, 错误: {e}")
-            return False
+        return self.clear_table(table_name)
 
     def get_items_list(self, table_name="items") -> list[dict[str, Any]]:
         """
@@ -946,16 +1387,11 @@ class ItemDBOperations:
         Returns:
             物品列表
         """
+        _validate_table_name(table_name)
         try:
             logger.debug(f"获取{table_name}表的物品列表")
 
-            # 初始化表（如果不存在则创建）
-            self._init_tables(table_name)
-
-            rows = self.db.execute_query(
-                f"SELECT * FROM {table_name} ORDER BY unique_id"
-            )
-            return [self._map_row_to_item(row) for row in rows]
+            return list(self.iter_items(table_name))
         except Exception as e:
             logger.error(f"获取物品列表失败: {table_name}, 错误: {e}")
             # 如果是表不存在的错误，返回空列表
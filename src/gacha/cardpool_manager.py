@@ -5,19 +5,175 @@
 
 from __future__ import annotations
 
+import contextlib
 import hashlib
 import json
+import logging
+import mmap
 import os
 import shutil
-from dataclasses import asdict, dataclass
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from astrbot.api import logger
 from astrbot.api.star import StarTools
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时回退到标准库 json
+    orjson = None
 
-@dataclass
+# 并行加载配置文件时的最大线程数
+_MAX_LOAD_WORKERS = 32
+# 需要读取的配置文件达到该数量时才使用线程池并行加载
+_PARALLEL_LOAD_MIN_FILES = 8
+# 不小于该大小（字节）的配置文件使用 mmap 读取
+_MMAP_MIN_SIZE = 4096
+# 路径分隔符不是正斜杠的平台（Windows）才需要统一分隔符
+_NEEDS_SEP_NORM = os.sep != "/"
+# 读取配置文件时使用的平台相关打开标志，不支持的平台上为 0
+_O_BINARY = getattr(os, "O_BINARY", 0)
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+
+def _json_loads(data: bytes) -> Any:
+    """解析 UTF-8 编码的 JSON 字节串"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """序列化为缩进 2 格、保留非 ASCII 字符的 UTF-8 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def _split_property_path(property_path: str) -> tuple[str, ...]:
+    """拆分以点分隔的属性路径，结果按路径缓存"""
+    return tuple(property_path.split("."))
+
+
+def _index_add(index: dict[str, list[str]], key: str, value: str):
+    """向一对多索引中追加值，已存在时保持原有顺序"""
+    values = index.setdefault(key, [])
+    if value not in values:
+        values.append(value)
+
+
+def _index_remove(index: dict[str, list[str]], key: str, value: str):
+    """从一对多索引中移除值，列表为空时删除该键"""
+    values = index.get(key)
+    if values and value in values:
+        values.remove(value)
+        if not values:
+            del index[key]
+
+
+def _open_readonly(path: str) -> int:
+    """以只读方式打开文件，在支持的平台上不更新访问时间
+
+    O_NOATIME 要求进程是文件所有者，没有权限时回退为普通只读打开
+    """
+    flags = os.O_RDONLY | _O_BINARY
+    if _O_NOATIME:
+        try:
+            return os.open(path, flags | _O_NOATIME)
+        except PermissionError:
+            pass
+    return os.open(path, flags)
+
+
+@lru_cache(maxsize=4096)
+def _cp_id(file_path: str, pool_name: str) -> str:
+    """计算相对路径+卡池名称对应的 cp_id，结果按参数缓存"""
+    # cp_id 会被保存到用户数据和抽卡记录中，必须保持与已有数据相同的 MD5 算法
+    combined = f"{file_path}:{pool_name}"
+    return hashlib.md5(combined.encode("utf-8")).hexdigest()[:12]
+
+
+def _intern_key(key: Any) -> Any:
+    """驻留稀有度等字典键，使所有卡池共享同一个字符串对象"""
+    return sys.intern(key) if isinstance(key, str) else key
+
+
+def _intern_keys(settings: dict[str, Any]) -> dict[str, Any]:
+    """返回键已驻留的字典副本"""
+    return {_intern_key(key): value for key, value in settings.items()}
+
+
+def _normalize_item_ids(item_ids: dict[str, Any]) -> dict[str, Any]:
+    """确保物品ID配置中的值是列表类型
+
+    字符串会尝试解析为JSON数组，解析失败或为None时使用空列表
+    """
+    result = {}
+    for rarity, items in item_ids.items():
+        if isinstance(items, str):
+            # 如果是字符串，尝试解析为JSON数组
+            try:
+                items = json.loads(items)
+            except (json.JSONDecodeError, TypeError):
+                # 如果解析失败，使用空列表
+                items = []
+        elif items is None:
+            items = []
+        result[_intern_key(rarity)] = items
+    return result
+
+
+def _normalize_progression(
+    progression_settings: dict[str, Any],
+) -> dict[str, Any]:
+    """确保概率递增配置中的值是正确的字典格式"""
+    result = {}
+    for rarity, progression in progression_settings.items():
+        if isinstance(progression, dict):
+            # 确保soft_pity是列表类型
+            if "soft_pity" in progression and isinstance(progression["soft_pity"], str):
+                progression = dict(progression)
+                try:
+                    progression["soft_pity"] = json.loads(progression["soft_pity"])
+                except (json.JSONDecodeError, TypeError):
+                    progression["soft_pity"] = []
+        else:
+            # 如果是字符串，尝试解析为JSON字典
+            try:
+                progression = json.loads(progression)
+            except (json.JSONDecodeError, TypeError):
+                # 如果解析失败，使用默认值
+                progression = {
+                    "hard_pity_pull": 80,
+                    "hard_pity_rate": 1,
+                    "soft_pity": [],
+                }
+        result[_intern_key(rarity)] = progression
+    return result
+
+
+# CardPoolConfig 支持的字段，以及其中没有默认值的必需字段
+_CONFIG_FIELDS = frozenset(
+    {
+        "cp_id",
+        "name",
+        "probability_settings",
+        "rate_up_item_ids",
+        "included_item_ids",
+        "probability_progression",
+        "config_group",
+        "enable",
+    }
+)
+_REQUIRED_CONFIG_FIELDS = _CONFIG_FIELDS - {"config_group", "enable"}
+
+
+@dataclass(slots=True)
 class CardPoolConfig:
     """卡池配置数据类
 
@@ -37,80 +193,57 @@ class CardPoolConfig:
         """初始化后处理"""
 
     def to_dict(self) -> dict[str, Any]:
-        """转换为字典格式"""
-        # 使用asdict转换为字典
-        result = asdict(self)
-
-        # 确保rate_up_item_ids中的值是列表类型
-        for rarity, items in result.get("rate_up_item_ids", {}).items():
-            if isinstance(items, str):
-                # 如果是字符串，尝试解析为JSON数组
-                try:
-                    result["rate_up_item_ids"][rarity] = json.loads(items)
-                except (json.JSONDecodeError, TypeError):
-                    # 如果解析失败，使用空列表
-                    result["rate_up_item_ids"][rarity] = []
-            elif items is None:
-                result["rate_up_item_ids"][rarity] = []
-
-        # 确保included_item_ids中的值是列表类型
-        for rarity, items in result.get("included_item_ids", {}).items():
-            if isinstance(items, str):
-                # 如果是字符串，尝试解析为JSON数组
-                try:
-                    result["included_item_ids"][rarity] = json.loads(items)
-                except (json.JSONDecodeError, TypeError):
-                    # 如果解析失败，使用空列表
-                    result["included_item_ids"][rarity] = []
-            elif items is None:
-                result["included_item_ids"][rarity] = []
-
-        # 确保probability_progression中的值是正确的字典格式
-        for rarity, progression in result.get("probability_progression", {}).items():
-            if isinstance(progression, dict):
-                # 确保soft_pity是列表类型
-                if "soft_pity" in progression and isinstance(
-                    progression["soft_pity"], str
-                ):
-                    try:
-                        progression["soft_pity"] = json.loads(progression["soft_pity"])
-                    except (json.JSONDecodeError, TypeError):
-                        progression["soft_pity"] = []
-            else:
-                # 如果是字符串，尝试解析为JSON字典
-                try:
-                    result["probability_progression"][rarity] = json.loads(progression)
-                except (json.JSONDecodeError, TypeError):
-                    # 如果解析失败，使用默认值
-                    result["probability_progression"][rarity] = {
-                        "hard_pity_pull": 80,
-                        "hard_pity_rate": 1,
-                        "soft_pity": [],
-                    }
+        """转换为字典格式
 
-        return result
+        只复制顶层字段，嵌套的字典与实例共享，调用方不应直接修改
+        """
+        return {
+            "cp_id": self.cp_id,
+            "name": self.name,
+            "probability_settings": self.probability_settings,
+            "rate_up_item_ids": self.rate_up_item_ids,
+            "included_item_ids": self.included_item_ids,
+            "probability_progression": self.probability_progression,
+            "config_group": self.config_group,
+            "enable": self.enable,
+        }
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> CardPoolConfig:
         # 只保留CardPoolConfig类支持的字段
-        valid_fields = {
-            "cp_id",
-            "name",
-            "probability_settings",
-            "rate_up_item_ids",
-            "included_item_ids",
-            "probability_progression",
-            "config_group",
-            "enable",
-        }
-        filtered_data = {k: v for k, v in data.items() if k in valid_fields}
+        if not data.keys() <= _CONFIG_FIELDS:
+            data = {k: v for k, v in data.items() if k in _CONFIG_FIELDS}
+        if not _REQUIRED_CONFIG_FIELDS <= data.keys():
+            # 缺少必需字段时交给 __init__ 抛出 TypeError
+            return cls(**data)
+
+        # 字段齐全时直接设置属性，跳过 __init__ 的参数绑定
+        # 外部数据在此处统一规范化，之后保存时无需再逐项检查
+        config = object.__new__(cls)
+        config.cp_id = data["cp_id"]
+        config.name = data["name"]
+        config.probability_settings = _intern_keys(data["probability_settings"])
+        config.rate_up_item_ids = _normalize_item_ids(data["rate_up_item_ids"])
+        config.included_item_ids = _normalize_item_ids(data["included_item_ids"])
+        config.probability_progression = _normalize_progression(
+            data["probability_progression"]
+        )
         # 如果没有config_group字段，默认为'default'
-        if "config_group" not in filtered_data:
-            filtered_data["config_group"] = "default"
+        config.config_group = data.get("config_group", "default")
         # 如果没有enable字段，默认为True
-        if "enable" not in filtered_data:
-            filtered_data["enable"] = True
-        return cls(**filtered_data)
+        config.enable = data.get("enable", True)
+        return config
+
+
+# CardPoolConfig 的字段名，按定义顺序排列
+_CONFIG_FIELD_NAMES = tuple(f.name for f in fields(CardPoolConfig))
+# 需要规范化的字段及其规范化函数
+_FIELD_NORMALIZERS = {
+    "probability_settings": _intern_keys,
+    "rate_up_item_ids": _normalize_item_ids,
+    "included_item_ids": _normalize_item_ids,
+    "probability_progression": _normalize_progression,
+}
 
 
 class CardPoolManager:
@@ -130,8 +263,18 @@ class CardPoolManager:
             self.config_dir = Path(StarTools.get_data_dir("astrbot_plugin_ww_gacha_sim")) / "card_pool_configs"
         else:
             self.config_dir = config_dir_path
+        # 带结尾分隔符的配置目录字符串，拼接配置文件路径时直接使用
+        self._config_dir_prefix = os.path.join(self.config_dir, "")
+        # 已确认存在的目录，保存配置时跳过重复的 makedirs
+        self._created_dirs: set[str] = set()
         self._configs: dict[str, CardPoolConfig] = {}  # 内存中的配置数据，键为 cp_id
         self._file_path_to_cp_id: dict[str, str] = {}  # 文件路径到 cp_id 的映射
+        self._basename_to_paths: dict[str, list[str]] = {}  # 文件名到文件路径的索引
+        self._cp_id_to_paths: dict[str, list[str]] = {}  # cp_id 到文件路径的索引
+        self._file_stamps: dict[str, tuple[int, int]] = {}  # 文件路径到 (修改时间, 大小) 的映射
+        self._name_to_cp_ids: dict[str, list[str]] = {}  # 卡池名称到 cp_id 的索引
+        self._enabled_configs: dict[str, CardPoolConfig] | None = None  # 启用配置的缓存
+        self._config_ids: tuple[str, ...] | None = None  # cp_id 列表的缓存
         # 确保配置目录存在
         self._ensure_dir_exists()
         # 初始化默认配置
@@ -161,7 +304,7 @@ class CardPoolManager:
             for item in presets_dir.iterdir():
                 if item.is_file() and item.suffix == ".json":
                     shutil.copy2(item, self.config_dir / item.name)
-                    logger.info(f"已复制预置配置: {item.name}")
+                    logger.info("已复制预置配置: %s", item.name)
                     
         except Exception as e:
             logger.error(f"初始化默认配置失败: {e}")
@@ -190,22 +333,34 @@ class CardPoolManager:
             cp_id = self._file_path_to_cp_id[normalized_path]
             return self._configs[cp_id]
             
-        # 3. 尝试通过名称模糊匹配
-        for config in self._configs.values():
-            if config.name == identifier:
-                return config
-                
+        # 3. 尝试通过名称匹配
+        cp_ids = self._name_to_cp_ids.get(identifier)
+        if cp_ids:
+            return self._configs[cp_ids[0]]
+
         return None
 
     def _ensure_dir_exists(self):
         """确保配置目录存在，不存在则创建"""
         try:
             os.makedirs(self.config_dir, exist_ok=True)
-            logger.info(f"配置目录已确保存在: {self.config_dir}")
+            self._created_dirs.add(str(self.config_dir))
+            logger.info("配置目录已确保存在: %s", self.config_dir)
         except OSError as e:
             logger.error(f"创建配置目录失败: {e}")
             raise RuntimeError(f"创建配置目录失败: {e}")
 
+    def _config_file_path(self, file_path: str) -> str:
+        """获取配置文件的完整路径
+
+        参数:
+            file_path: 配置文件路径（不含.json后缀）
+
+        返回:
+            配置文件完整路径
+        """
+        return f"{self._config_dir_prefix}{file_path}.json"
+
     def _generate_cp_id(self, file_path: str, pool_name: str) -> str:
         """
         根据相对路径+卡池名称生成唯一的 cp_id
@@ -217,89 +372,291 @@ class CardPoolManager:
         返回:
             12位的十六进制哈希值
         """
-        combined = f"{file_path}:{pool_name}"
-        hash_obj = hashlib.md5(combined.encode("utf-8"))
-        return hash_obj.hexdigest()[:12]
+        return _cp_id(file_path, pool_name)
+
+    def _set_config(self, config_instance: CardPoolConfig):
+        """将配置写入内存，同步更新名称索引并使启用配置缓存失效"""
+        cp_id = config_instance.cp_id
+        old_config = self._configs.get(cp_id)
+        if old_config is None:
+            self._config_ids = None
+        if old_config is None or old_config.name != config_instance.name:
+            if old_config is not None:
+                _index_remove(self._name_to_cp_ids, old_config.name, cp_id)
+            _index_add(self._name_to_cp_ids, config_instance.name, cp_id)
+        self._configs[cp_id] = config_instance
+        self._enabled_configs = None
+
+    def _remove_config(self, cp_id: str):
+        """从内存中删除配置，同步更新名称索引并使启用配置缓存失效"""
+        config_instance = self._configs.pop(cp_id)
+        _index_remove(self._name_to_cp_ids, config_instance.name, cp_id)
+        self._enabled_configs = None
+        self._config_ids = None
+
+    def _register_file_path(self, file_path: str, cp_id: str):
+        """记录文件路径到 cp_id 的映射，并同步更新文件名和 cp_id 索引"""
+        old_cp_id = self._file_path_to_cp_id.get(file_path)
+        if old_cp_id is not None and old_cp_id != cp_id:
+            _index_remove(self._cp_id_to_paths, old_cp_id, file_path)
+        self._file_path_to_cp_id[file_path] = cp_id
+        _index_add(self._basename_to_paths, os.path.basename(file_path), file_path)
+        _index_add(self._cp_id_to_paths, cp_id, file_path)
+
+    def _unregister_file_path(self, file_path: str):
+        """移除文件路径映射，并同步更新文件名和 cp_id 索引"""
+        cp_id = self._file_path_to_cp_id.pop(file_path)
+        self._file_stamps.pop(file_path, None)
+        _index_remove(self._basename_to_paths, os.path.basename(file_path), file_path)
+        _index_remove(self._cp_id_to_paths, cp_id, file_path)
+
+    def _file_stamp_unchanged(self, file_path: str) -> bool:
+        """检查配置文件自上次读取或保存后是否未被修改
+
+        参数:
+            file_path: 配置文件路径（不含.json后缀）
+
+        返回:
+            文件未被修改时返回 True，文件已变化或无法访问时返回 False
+        """
+        try:
+            st = os.stat(self._config_file_path(file_path))
+        except OSError:
+            return False
+        return self._file_stamps.get(file_path) == (st.st_mtime_ns, st.st_size)
+
+    def get_config_file_path(self, cp_id: str) -> str | None:
+        """获取 cp_id 对应的配置文件路径
+
+        参数:
+            cp_id: 卡池ID
+
+        返回:
+            配置文件路径（不含.json后缀），不存在时返回 None
+        """
+        paths = self._cp_id_to_paths.get(cp_id)
+        return paths[0] if paths else None
+
+    def _resolve_file_path(self, file_path: str) -> tuple[str, str]:
+        """根据文件路径或文件名查找实际的配置文件路径和 cp_id
+
+        参数:
+            file_path: 配置文件路径或文件名（不含.json后缀）
+
+        返回:
+            (实际文件路径, cp_id)
+
+        异常:
+            KeyError: 配置不存在
+        """
+        # 先尝试直接查找
+        if file_path in self._file_path_to_cp_id:
+            return file_path, self._file_path_to_cp_id[file_path]
+
+        # 再通过文件名索引查找
+        paths = self._basename_to_paths.get(file_path)
+        if paths:
+            return paths[0], self._file_path_to_cp_id[paths[0]]
+
+        logger.error(f"配置文件不存在: {file_path}")
+        raise KeyError(f"配置文件 {file_path} 不存在")
+
+    def _scan_config_files(self) -> list[tuple[str, str]]:
+        """深度扫描配置目录及其子目录中的JSON配置文件
+
+        返回:
+            (完整路径, 相对路径不含.json后缀) 列表
+        """
+        entries = []
+        prefix_len = len(self._config_dir_prefix)
+        # 使用显式栈按 os.walk 的顺序（先序、目录内按列举顺序）遍历，
+        # DirEntry 缓存了文件类型，无需额外的 stat 调用
+        stack = [str(self.config_dir)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    dir_entries = list(it)
+            except OSError as e:
+                logger.debug("无法读取目录: %s - %s", directory, e)
+                continue
+
+            subdirs = []
+            for entry in dir_entries:
+                if entry.is_dir():
+                    # 与 os.walk 一致，不进入符号链接指向的目录
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+
+                filename = entry.name
+                if filename.endswith(".json"):
+                    # 跳过文件名为 .json 的配置文件（即 .json 后缀前是空白字符）
+                    if filename == ".json":
+                        logger.debug("跳过文件名为 .json 的配置文件")
+                        continue
+
+                    # 计算相对于配置目录的路径，移除.json后缀，将路径分隔符统一为正斜杠
+                    full_path = entry.path
+                    file_path = full_path[prefix_len:-5]
+                    if _NEEDS_SEP_NORM:
+                        file_path = file_path.replace("\\", "/")
+                    entries.append((full_path, file_path))
+
+            # 逆序入栈，保证子目录按列举顺序依次出栈
+            stack.extend(reversed(subdirs))
+        return entries
+
+    @staticmethod
+    def _read_config_file(full_path: str) -> tuple[Any, tuple[int, int]]:
+        """读取并解析单个JSON配置文件
+
+        参数:
+            full_path: 配置文件完整路径
+
+        返回:
+            (解析后的配置数据, 文件的 (修改时间纳秒, 大小) 标记)
+        """
+        fd = _open_readonly(full_path)
+        try:
+            st = os.fstat(fd)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if orjson is None or st.st_size < _MMAP_MIN_SIZE:
+                # 小文件直接读取，mmap 的建立开销反而更大
+                with os.fdopen(fd, "rb", closefd=False) as f:
+                    return _json_loads(f.read()), stamp
+            # 大文件映射到内存后直接交给 orjson 解析，省去一次内核到用户态的拷贝
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm, memoryview(
+                mm
+            ) as view:
+                return orjson.loads(view), stamp
+        finally:
+            os.close(fd)
 
     def load_all_configs(self) -> dict[str, CardPoolConfig]:
         """加载指定目录及其子目录下的所有JSON配置文件到内存
 
+        自上次加载或保存后修改时间和大小都未变化的文件直接复用已有配置，
+        其余文件较多时在线程池中并行读取和解析，结果按扫描顺序在当前线程中
+        写入内存，因此不需要加锁
+
         返回:
-            加载的配置字典，键为 cp_id，值为配置数据类实例
+            加载的配置字典，键为 cp_id，值为配置数据类实例；
+            返回的是内部字典本身，调用方如需修改应自行复制
         """
         try:
+            # 记录上次加载的结果，用于复用未变化的文件
+            previous = {
+                file_path: (self._file_stamps.get(file_path), self._configs.get(cp_id))
+                for file_path, cp_id in self._file_path_to_cp_id.items()
+            }
+
             self._configs.clear()
+            self._name_to_cp_ids.clear()
+            self._enabled_configs = None
+            self._config_ids = None
             self._file_path_to_cp_id.clear()
+            self._basename_to_paths.clear()
+            self._cp_id_to_paths.clear()
+            self._file_stamps.clear()
 
-            # 深度扫描配置目录及其子目录
-            for root, dirs, files in os.walk(self.config_dir):
-                for filename in files:
-                    if filename.endswith(".json"):
-                        # 跳过文件名为 .json 的配置文件（即 .json 后缀前是空白字符）
-                        if filename == ".json":
-                            logger.debug("跳过文件名为 .json 的配置文件")
-                            continue
+            entries = self._scan_config_files()
 
-                        # 计算相对于配置目录的路径
-                        full_path = os.path.join(root, filename)
-                        rel_path = os.path.relpath(full_path, self.config_dir)
-                        file_path = rel_path[
-                            :-5
-                        ]  # 移除.json后缀，将路径分隔符统一为正斜杠
-                        file_path = file_path.replace("\\", "/")
+            reused: dict[str, tuple[tuple[int, int], CardPoolConfig]] = {}
+            to_read = []
+            for full_path, file_path in entries:
+                stamp, config_instance = previous.get(file_path, (None, None))
+                if stamp is not None and config_instance is not None:
+                    try:
+                        st = os.stat(full_path)
+                    except OSError:
+                        st = None
+                    if st is not None and stamp == (st.st_mtime_ns, st.st_size):
+                        reused[file_path] = (stamp, config_instance)
+                        continue
+                to_read.append(full_path)
+
+            if not entries:
+                logger.info("共加载 0 个配置文件")
+                return self._configs
+
+            # 文件较少时线程池的启动开销大于并行收益，直接在当前线程中读取
+            executor = (
+                ThreadPoolExecutor(max_workers=min(_MAX_LOAD_WORKERS, len(to_read)))
+                if len(to_read) >= _PARALLEL_LOAD_MIN_FILES
+                else None
+            )
+            with executor or contextlib.nullcontext():
+                if executor is not None:
+                    results = executor.map(self._read_config_file, to_read)
+                else:
+                    results = map(self._read_config_file, to_read)
+                # 逐个文件的加载日志降为 DEBUG 级别，只有开启时才输出
+                log_each = logger.isEnabledFor(logging.DEBUG)
+
+                for _, file_path in entries:
+                    if file_path in reused:
+                        stamp, config_instance = reused[file_path]
+                        self._set_config(config_instance)
+                        self._register_file_path(file_path, config_instance.cp_id)
+                        self._file_stamps[file_path] = stamp
+                        continue
+
+                    try:
+                        config_data, stamp = next(results)
+
+                        # 跳过没有名称的卡池配置
+                        if (
+                            "name" not in config_data
+                            or not config_data["name"]
+                            or not config_data["name"].strip()
+                        ):
+                            logger.warning(f"跳过没有名称的配置文件: {file_path}")
+                            continue
 
-                        try:
-                            with open(full_path, encoding="utf-8") as f:
-                                config_data = json.load(f)
-
-                                # 跳过没有名称的卡池配置
-                                if (
-                                    "name" not in config_data
-                                    or not config_data["name"]
-                                    or not config_data["name"].strip()
-                                ):
-                                    logger.warning(
-                                        f"跳过没有名称的配置文件: {file_path}"
-                                    )
-                                    continue
-
-                                # 确保cp_id存在，根据相对路径+卡池名称生成唯一ID
-                                if "cp_id" not in config_data:
-                                    config_data["cp_id"] = self._generate_cp_id(
-                                        file_path, config_data["name"]
-                                    )
-                                # 转换为数据类实例
-                                config_instance = CardPoolConfig.from_dict(config_data)
-                                self._configs[config_instance.cp_id] = config_instance
-                                self._file_path_to_cp_id[file_path] = (
-                                    config_instance.cp_id
-                                )
-                                logger.info(
-                                    f"已加载配置文件: {file_path}, cp_id: {config_instance.cp_id}"
-                                )
-                        except json.JSONDecodeError as e:
-                            logger.error(f"JSON格式错误: {file_path} - {e}")
-                            raise ValueError(f"配置文件 {file_path} 格式错误: {e}")
-                        except OSError as e:
-                            logger.error(f"读取文件失败: {file_path} - {e}")
-                            raise OSError(f"读取配置文件 {file_path} 失败: {e}")
-                        except Exception as e:
-                            logger.error(f"处理配置文件 {file_path} 失败: {e}")
-                            raise RuntimeError(f"处理配置文件 {file_path} 失败: {e}")
-
-            logger.info(f"共加载 {len(self._configs)} 个配置文件")
-            return self._configs.copy()
+                        # 确保cp_id存在，根据相对路径+卡池名称生成唯一ID
+                        if "cp_id" not in config_data:
+                            config_data["cp_id"] = self._generate_cp_id(
+                                file_path, config_data["name"]
+                            )
+                        # 转换为数据类实例
+                        config_instance = CardPoolConfig.from_dict(config_data)
+                        self._set_config(config_instance)
+                        self._register_file_path(file_path, config_instance.cp_id)
+                        self._file_stamps[file_path] = stamp
+                        if log_each:
+                            logger.debug(
+                                "已加载配置文件: %s, cp_id: %s",
+                                file_path,
+                                config_instance.cp_id,
+                            )
+                    except json.JSONDecodeError as e:
+                        logger.error(f"JSON格式错误: {file_path} - {e}")
+                        raise ValueError(f"配置文件 {file_path} 格式错误: {e}")
+                    except OSError as e:
+                        logger.error(f"读取文件失败: {file_path} - {e}")
+                        raise OSError(f"读取配置文件 {file_path} 失败: {e}")
+                    except Exception as e:
+                        logger.error(f"处理配置文件 {file_path} 失败: {e}")
+                        raise RuntimeError(f"处理配置文件 {file_path} 失败: {e}")
+
+            logger.info("共加载 %d 个配置文件", len(self._configs))
+            return self._configs
         except Exception as e:
             logger.error(f"加载配置文件失败: {e}")
             raise RuntimeError(f"加载配置文件失败: {e}")
 
-    def get_config_ids(self) -> list[str]:
+    def get_config_ids(self) -> tuple[str, ...]:
         """获取所有配置的 cp_id 列表
 
+        结果会缓存到配置增删为止
+
         返回:
-            cp_id 列表
+            cp_id 元组
         """
-        return list(self._configs.keys())
+        if self._config_ids is None:
+            self._config_ids = tuple(self._configs)
+        return self._config_ids
 
     def get_config(self, config_identifier: str) -> CardPoolConfig:
         """获取指定配置
@@ -334,12 +691,7 @@ class CardPoolManager:
         返回:
             匹配的配置列表
         """
-        matched_configs = []
-        for cp_id, config in self._configs.items():
-            if config.name == name:
-                matched_configs.append(config)
-
-        return matched_configs
+        return [self._configs[cp_id] for cp_id in self._name_to_cp_ids.get(name, ())]
 
     def get_config_by_cp_id(self, cp_id: str) -> CardPoolConfig:
         """通过 cp_id (UUID) 查找配置
@@ -404,10 +756,12 @@ class CardPoolManager:
             self._save_config(full_file_path, config_instance)
 
             # 添加到内存
-            self._configs[config_instance.cp_id] = config_instance
-            self._file_path_to_cp_id[full_file_path] = config_instance.cp_id
+            self._set_config(config_instance)
+            self._register_file_path(full_file_path, config_instance.cp_id)
 
-            logger.info(f"已添加配置: {full_file_path}, cp_id: {config_instance.cp_id}")
+            logger.info(
+                "已添加配置: %s, cp_id: %s", full_file_path, config_instance.cp_id
+            )
             return config_instance
         except Exception as e:
             logger.error(f"添加配置失败: {file_path} - {e}")
@@ -431,27 +785,7 @@ class CardPoolManager:
             IOError: 保存文件失败
         """
         # 检查配置是否存在
-        cp_id = None
-        actual_file_path = None
-
-        # 先尝试直接查找
-        if file_path in self._file_path_to_cp_id:
-            cp_id = self._file_path_to_cp_id[file_path]
-            actual_file_path = file_path
-        else:
-            # 尝试查找匹配的配置ID
-            for path, cpid in self._file_path_to_cp_id.items():
-                if os.path.basename(path) == file_path:
-                    cp_id = cpid
-                    actual_file_path = path
-                    break
-
-        if not cp_id:
-            logger.error(f"配置文件不存在: {file_path}")
-            raise KeyError(f"配置文件 {file_path} 不存在")
-
-        assert actual_file_path is not None
-        assert cp_id is not None
+        actual_file_path, cp_id = self._resolve_file_path(file_path)
 
         try:
             # 如果更新数据中没有cp_id，保留原有的cp_id
@@ -467,26 +801,36 @@ class CardPoolManager:
                 config_instance.config_group, os.path.basename(str(actual_file_path))
             )
 
-            # 如果配置组变化，需要先删除旧文件
+            # 内容与路径均未变化，且文件自上次读取或保存后未被外部修改时，无需重新写入
+            if (
+                new_file_path == actual_file_path
+                and config_instance == self._configs.get(cp_id)
+                and self._file_stamp_unchanged(actual_file_path)
+            ):
+                logger.debug("配置未变化，跳过保存: %s", actual_file_path)
+                return self._configs[cp_id]
+
+            # 先保存到新路径，成功后再删除旧文件，避免配置在磁盘上短暂缺失
+            self._save_config(new_file_path, config_instance)
+
+            # 如果配置组变化，删除旧文件
             if new_file_path != actual_file_path:
-                # 删除旧文件
-                old_full_path = os.path.join(
-                    self.config_dir, f"{actual_file_path}.json"
-                )
-                if os.path.exists(old_full_path):
+                old_full_path = self._config_file_path(actual_file_path)
+                try:
                     os.remove(old_full_path)
+                except FileNotFoundError:
+                    pass
 
                 # 更新内存映射
-                del self._file_path_to_cp_id[actual_file_path]
-                self._file_path_to_cp_id[new_file_path] = cp_id
-
-            # 保存到文件
-            self._save_config(new_file_path, config_instance)
+                self._unregister_file_path(actual_file_path)
+                self._register_file_path(new_file_path, cp_id)
 
             # 更新内存中的配置
-            self._configs[config_instance.cp_id] = config_instance
+            self._set_config(config_instance)
 
-            logger.info(f"已更新配置: {new_file_path}, cp_id: {config_instance.cp_id}")
+            logger.info(
+                "已更新配置: %s, cp_id: %s", new_file_path, config_instance.cp_id
+            )
             return config_instance
         except Exception as e:
             logger.error(f"更新配置失败: {file_path} - {e}")
@@ -511,66 +855,59 @@ class CardPoolManager:
             IOError: 保存文件失败
         """
         # 检查配置是否存在
-        cp_id = None
-        actual_file_path = None
-
-        # 先尝试直接查找
-        if file_path in self._file_path_to_cp_id:
-            cp_id = self._file_path_to_cp_id[file_path]
-            actual_file_path = file_path
-        else:
-            # 尝试查找匹配的配置ID
-            for path, cpid in self._file_path_to_cp_id.items():
-                if os.path.basename(path) == file_path:
-                    cp_id = cpid
-                    actual_file_path = path
-                    break
-
-        if not cp_id:
-            logger.error(f"配置文件不存在: {file_path}")
-            raise KeyError(f"配置文件 {file_path} 不存在")
-
-        assert actual_file_path is not None
-        assert cp_id is not None
+        actual_file_path, cp_id = self._resolve_file_path(file_path)
 
         try:
             # 获取当前配置
             config_instance = self._configs[cp_id]
 
-            # 将数据类转换为字典以便修改
-            config_dict = asdict(config_instance)
+            # 将数据类浅拷贝为字典以便修改
+            config_dict = {
+                name: getattr(config_instance, name) for name in _CONFIG_FIELD_NAMES
+            }
 
             # 处理属性路径
-            keys = property_path.split(".")
+            keys = _split_property_path(property_path)
+            top_key = keys[0]
+            if top_key not in config_dict:
+                raise ValueError(
+                    f"属性路径无效: {property_path} (在 {top_key} 处找不到)"
+                )
             current = config_dict
 
             # 遍历属性路径，直到最后一个键
+            # 只复制路径上经过的字典，避免修改内存中的原配置
             for i, key in enumerate(keys[:-1]):
                 if key not in current:
                     raise ValueError(
                         f"属性路径无效: {property_path} (在 {key} 处找不到)"
                     )
-                current = current[key]
-
-                if not isinstance(current, dict):
+                if not isinstance(current[key], dict):
                     raise ValueError(
                         f"属性路径无效: {property_path} (在 {key} 处不是字典)"
                     )
+                current[key] = dict(current[key])
+                current = current[key]
 
             # 设置属性值
             last_key = keys[-1]
             current[last_key] = value
 
-            # 转换回数据类实例
-            updated_instance = CardPoolConfig.from_dict(config_dict)
+            # 其余字段已是规范化后的值，只需重新规范化被修改的字段
+            normalize = _FIELD_NORMALIZERS.get(top_key)
+            if normalize is not None:
+                config_dict[top_key] = normalize(config_dict[top_key])
+
+            # 字段齐全且均有效，直接构造数据类实例
+            updated_instance = CardPoolConfig(**config_dict)
 
             # 保存到文件
             self._save_config(actual_file_path, updated_instance)
 
             # 更新内存中的配置
-            self._configs[updated_instance.cp_id] = updated_instance
+            self._set_config(updated_instance)
 
-            logger.info(f"已修改配置属性: {actual_file_path}.{property_path}")
+            logger.info("已修改配置属性: %s.%s", actual_file_path, property_path)
             return updated_instance
         except Exception as e:
             logger.error(f"修改配置属性失败: {file_path}.{property_path} - {e}")
@@ -592,41 +929,21 @@ class CardPoolManager:
             IOError: 删除文件失败
         """
         # 检查配置是否存在
-        cp_id = None
-        actual_file_path = None
-
-        # 先尝试直接查找
-        if file_path in self._file_path_to_cp_id:
-            cp_id = self._file_path_to_cp_id[file_path]
-            actual_file_path = file_path
-        else:
-            # 尝试查找匹配的配置ID
-            for path, cpid in self._file_path_to_cp_id.items():
-                if os.path.basename(path) == file_path:
-                    cp_id = cpid
-                    actual_file_path = path
-                    break
-
-        if not cp_id:
-            logger.error(f"配置文件不存在: {file_path}")
-            raise KeyError(f"配置文件 {file_path} 不存在")
-
-        assert actual_file_path is not None
-        assert cp_id is not None
+        actual_file_path, cp_id = self._resolve_file_path(file_path)
 
         try:
             # 删除配置文件
-            full_path = os.path.join(self.config_dir, f"{actual_file_path}.json")
+            full_path = self._config_file_path(actual_file_path)
             if os.path.exists(full_path):
                 os.remove(full_path)
-                logger.info(f"已删除配置文件: {actual_file_path}.json")
+                logger.info("已删除配置文件: %s.json", actual_file_path)
             else:
                 logger.warning(f"配置文件不存在: {actual_file_path}.json")
 
             # 从内存中删除
-            del self._configs[cp_id]
-            del self._file_path_to_cp_id[actual_file_path]
-            logger.info(f"已删除配置: {actual_file_path}, cp_id: {cp_id}")
+            self._remove_config(cp_id)
+            self._unregister_file_path(actual_file_path)
+            logger.info("已删除配置: %s, cp_id: %s", actual_file_path, cp_id)
             return True
         except Exception as e:
             logger.error(f"删除配置失败: {file_path} - {e}")
@@ -647,15 +964,34 @@ class CardPoolManager:
             config_dict = config_instance.to_dict()
 
             # 保存到文件
-            full_path = os.path.join(self.config_dir, f"{file_path}.json")
+            full_path = self._config_file_path(file_path)
 
-            # 创建必要的目录
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # 创建必要的目录，已确认存在的目录不再重复检查
+            dirname = os.path.dirname(full_path)
+            if dirname not in self._created_dirs:
+                os.makedirs(dirname, exist_ok=True)
+                self._created_dirs.add(dirname)
 
-            with open(full_path, "w", encoding="utf-8") as f:
-                json.dump(config_dict, f, ensure_ascii=False, indent=2)
+            # 先写入临时文件再原子替换，写入中途失败不会留下不完整的配置文件
+            tmp_path = f"{full_path}.tmp"
+            try:
+                try:
+                    f = open(tmp_path, "wb")
+                except FileNotFoundError:
+                    # 目录可能已在外部被删除，重新创建后重试
+                    os.makedirs(dirname, exist_ok=True)
+                    f = open(tmp_path, "wb")
+                with f:
+                    f.write(_json_dumps(config_dict))
+                os.replace(tmp_path, full_path)
+                st = os.stat(full_path)
+                self._file_stamps[file_path] = (st.st_mtime_ns, st.st_size)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+                raise
 
-            logger.info(f"已保存配置: {file_path} 到 {full_path}")
+            logger.info("已保存配置: %s 到 %s", file_path, full_path)
         except OSError as e:
             logger.error(f"保存配置失败: {file_path} - {e}")
             raise OSError(f"保存配置 {file_path} 失败: {e}")
@@ -705,17 +1041,21 @@ class CardPoolManager:
             raise KeyError(f"配置文件 {file_path} 不存在")
 
         cp_id = self._file_path_to_cp_id[file_path]
-        full_path = os.path.join(self.config_dir, f"{file_path}.json")
+        full_path = self._config_file_path(file_path)
 
         try:
-            with open(full_path, encoding="utf-8") as f:
-                config_data = json.load(f)
-                config_instance = CardPoolConfig.from_dict(config_data)
-                self._configs[config_instance.cp_id] = config_instance
-                logger.info(
-                    f"已重新加载配置: {file_path}, cp_id: {config_instance.cp_id}"
-                )
-                return config_instance
+            # 文件自上次读取或保存后未变化时直接返回内存中的配置
+            if self._file_stamp_unchanged(file_path) and cp_id in self._configs:
+                return self._configs[cp_id]
+
+            config_data, stamp = self._read_config_file(full_path)
+            config_instance = CardPoolConfig.from_dict(config_data)
+            self._set_config(config_instance)
+            self._file_stamps[file_path] = stamp
+            logger.info(
+                "已重新加载配置: %s, cp_id: %s", file_path, config_instance.cp_id
+            )
+            return config_instance
         except json.JSONDecodeError as e:
             logger.error(f"JSON格式错误: {file_path} - {e}")
             raise ValueError(f"配置文件 {file_path} 格式错误: {e}")
@@ -738,49 +1078,34 @@ class CardPoolManager:
             IOError: 保存文件失败
         """
         # 检查配置是否存在
-        cp_id = None
-        actual_file_path = None
-
-        # 先尝试直接查找
-        if file_path in self._file_path_to_cp_id:
-            cp_id = self._file_path_to_cp_id[file_path]
-            actual_file_path = file_path
-        else:
-            # 尝试查找匹配的配置ID
-            for path, cpid in self._file_path_to_cp_id.items():
-                if os.path.basename(path) == file_path:
-                    cp_id = cpid
-                    actual_file_path = path
-                    break
-
-        if not cp_id:
-            logger.error(f"配置文件不存在: {file_path}")
-            raise KeyError(f"配置文件 {file_path} 不存在")
-
-        assert actual_file_path is not None
-        assert cp_id is not None
+        actual_file_path, cp_id = self._resolve_file_path(file_path)
 
         try:
             # 获取当前配置
             config_instance = self._configs[cp_id]
 
-            # 将数据类转换为字典以便修改
-            config_dict = asdict(config_instance)
+            # 将数据类浅拷贝为字典以便修改
+            config_dict = {
+                name: getattr(config_instance, name) for name in _CONFIG_FIELD_NAMES
+            }
 
             # 设置 enable 字段
             config_dict["enable"] = enable
 
-            # 转换回数据类实例
-            updated_instance = CardPoolConfig.from_dict(config_dict)
+            # 字段齐全且均有效，直接构造数据类实例
+            updated_instance = CardPoolConfig(**config_dict)
 
             # 保存到文件
             self._save_config(actual_file_path, updated_instance)
 
             # 更新内存中的配置
-            self._configs[updated_instance.cp_id] = updated_instance
+            self._set_config(updated_instance)
 
             logger.info(
-                f"已{'启用' if enable else '禁用'}配置: {actual_file_path}, cp_id: {updated_instance.cp_id}"
+                "已%s配置: %s, cp_id: %s",
+                "启用" if enable else "禁用",
+                actual_file_path,
+                updated_instance.cp_id,
             )
             return updated_instance
         except Exception as e:
@@ -794,9 +1119,15 @@ class CardPoolManager:
     def get_enabled_configs(self) -> dict[str, CardPoolConfig]:
         """获取所有启用的配置
 
+        结果会缓存到配置发生变化为止，调用方不应修改返回的字典
+
         返回:
             启用的配置字典，键为 cp_id，值为配置数据类实例
         """
-        return {
-            cp_id: config for cp_id, config in self._configs.items() if config.enable
-        }
+        if self._enabled_configs is None:
+            self._enabled_configs = {
+                cp_id: config
+                for cp_id, config in self._configs.items()
+                if config.enable
+            }
+        return self._enabled_configs
@@ -3,7 +3,9 @@
 实现抽卡流程控制逻辑，包括用户状态管理、抽卡执行和结果统计
 """
 
-from datetime import datetime
+import time
+from functools import cached_property
+from operator import attrgetter
 from typing import Any
 
 from astrbot.api import logger
@@ -12,6 +14,34 @@ from ..item_data.item_manager import Item, ItemManager
 from .cardpool_manager import CardPoolConfig
 from .gacha_mechanics import GachaMechanics
 
+# 未指定数据库操作实例时共用的默认实例，首次使用时创建
+_shared_db_ops: GachaDBOperations | None = None
+
+
+# 最近一次格式化的抽卡时间：(Unix 秒, 格式化后的字符串)
+# 整体替换元组，多线程读取时不会读到不一致的秒数和字符串
+_last_pull_time: tuple[int, str] = (-1, "")
+
+
+def _format_pull_time() -> str:
+    """获取当前时间的抽卡记录时间字符串，同一秒内复用上一次的格式化结果"""
+    global _last_pull_time
+    sec = int(time.time())
+    cached = _last_pull_time
+    if cached[0] == sec:
+        return cached[1]
+    formatted = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+    _last_pull_time = (sec, formatted)
+    return formatted
+
+
+def _get_shared_db_ops() -> GachaDBOperations:
+    """获取共用的默认抽卡数据库操作实例"""
+    global _shared_db_ops
+    if _shared_db_ops is None:
+        _shared_db_ops = GachaDBOperations()
+    return _shared_db_ops
+
 
 class GachaFlow:
     """抽卡流程管理类
@@ -23,23 +53,40 @@ class GachaFlow:
     def __init__(
         self,
         user_id: str,
-        db_ops: GachaDBOperations = GachaDBOperations(),
-        item_data_manager: ItemManager = ItemManager(),
+        db_ops: GachaDBOperations | None = None,
+        item_data_manager: ItemManager | None = None,
     ):
         """
         初始化抽卡流程管理器
 
+        只记录依赖，用户状态在首次抽卡时才从数据库加载，
+        未传入物品数据管理器时也在首次抽卡时才创建
+
         Args:
             user_id: 用户唯一标识符
         """
         self.user_id = user_id
-        self.db_ops = db_ops
-        self.item_data_manager = item_data_manager
-        # 初始化抽卡机制
-        self.gacha_mechanics = GachaMechanics(self.item_data_manager)
-
-        # 从数据库加载用户状态，如果不存在则使用默认值
-        user_state = self.db_ops.load_user_state(user_id)
+        self.db_ops = db_ops if db_ops is not None else _get_shared_db_ops()
+        if item_data_manager is not None:
+            # 直接写入实例属性，覆盖下方 cached_property 的默认创建
+            self.item_data_manager = item_data_manager
+        self._state_loaded = False
+
+    @cached_property
+    def item_data_manager(self) -> ItemManager:
+        """物品数据管理器实例，未传入时在首次抽卡时创建并加载物品数据"""
+        return ItemManager()
+
+    @cached_property
+    def gacha_mechanics(self) -> GachaMechanics:
+        """抽卡机制实例，首次抽卡时创建"""
+        return GachaMechanics(self.item_data_manager)
+
+    def _load_user_state(self):
+        """确保用户在数据库中存在并加载用户状态，如果不存在则使用默认值"""
+        if self._state_loaded:
+            return
+        user_state = self.db_ops.load_or_create_user(self.user_id)
         if user_state:
             # 加载已保存的用户状态（保留用户特定的数据）
             self.pity_5star = user_state["pity_5star"]
@@ -50,9 +97,7 @@ class GachaFlow:
         else:
             # 初始化新用户状态
             self._reset()
-
-        # 确保用户在数据库中存在
-        self.db_ops.create_user(user_id)
+        self._state_loaded = True
 
     def _reset(self):
         """重置所有状态到初始值"""
@@ -62,14 +107,13 @@ class GachaFlow:
         self.pity_4star = 0
         self.pull_count = 0
 
-    def _save_pull_data(self, pull_data: dict[str, Any]):
+    def _save_pull_data(self, pull_history: list[dict[str, Any]]):
         """
-        直接保存抽卡数据到数据库
+        在后台保存用户状态和抽卡记录到数据库
 
         Args:
-            pull_data: 包含抽卡结果的字典
+            pull_history: 本次抽卡产生的抽卡记录列表
         """
-        # 保存用户状态到数据库
         state_data = {
             "pity_5star": self.pity_5star,
             "pity_4star": self.pity_4star,
@@ -77,10 +121,8 @@ class GachaFlow:
             "_4star_guaranteed": self._4star_guaranteed,
             "pull_count": self.pull_count,
         }
-        self.db_ops.save_user_state(self.user_id, state_data)
-
-        # 保存抽卡记录到数据库
-        self.db_ops.save_pull_history(self.user_id, pull_data)
+        # 用户状态和抽卡记录在同一个事务中写入，不阻塞抽卡结果的返回
+        self.db_ops.save_pull_results_async(self.user_id, state_data, pull_history)
 
     def pull(self, pool_config: CardPoolConfig) -> Item | None:
         """
@@ -96,6 +138,8 @@ class GachaFlow:
         if hasattr(pool_config, "config_group"):
             self.item_data_manager.set_config_group(pool_config.config_group)
 
+        self._load_user_state()
+
         # 执行抽卡核心逻辑，获取物品和更新后的状态
         (
             item,
@@ -150,12 +194,14 @@ class GachaFlow:
         # 保存抽卡数据到数据库
         try:
             self._save_pull_data(
-                {
-                    "item": pull_result["item"],
-                    "rarity": pull_result["rarity"],
-                    "pool_id": getattr(pool_config, "cp_id", ""),
-                    "pull_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                }
+                [
+                    {
+                        "item": pull_result["item"],
+                        "rarity": pull_result["rarity"],
+                        "pool_id": getattr(pool_config, "cp_id", ""),
+                        "pull_time": _format_pull_time(),
+                    }
+                ]
             )
         except Exception as e:
             logger.error(f"保存抽卡数据失败: {e}")
@@ -176,7 +222,10 @@ class GachaFlow:
         if hasattr(pool_config, "config_group"):
             self.item_data_manager.set_config_group(pool_config.config_group)
 
-        pull_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._load_user_state()
+
+        pull_time = _format_pull_time()
+        pool_id = getattr(pool_config, "cp_id", "")
 
         items = []
         pull_history_batch = []  # 批量保存的抽卡历史
@@ -216,21 +265,15 @@ class GachaFlow:
                     self._4star_guaranteed = new__4star_guaranteed
                     self.pull_count += 1
 
-                    # 从数据库获取物品详细信息并转换为Item对象
-                    if item and hasattr(item, "external_id"):
-                        # 如果item已经是Item对象
+                    if isinstance(item, Item):
                         items.append(item)
 
                         # 记录抽卡历史，用于批量保存
                         pull_history_batch.append(
                             {
-                                "item": item.name
-                                if item and hasattr(item, "name")
-                                else (item if item else "未知物品"),
-                                "rarity": item.rarity
-                                if item and hasattr(item, "rarity")
-                                else "3star",
-                                "pool_id": getattr(pool_config, "cp_id", ""),
+                                "item": item.name,
+                                "rarity": item.rarity,
+                                "pool_id": pool_id,
                                 "pull_time": pull_time,
                             }
                         )
@@ -248,24 +291,9 @@ class GachaFlow:
             raise
 
         # 一次性保存用户状态和抽卡历史到数据库
-        state_data = {
-            "pity_5star": self.pity_5star,
-            "pity_4star": self.pity_4star,
-            "_5star_guaranteed": self._5star_guaranteed,
-            "_4star_guaranteed": self._4star_guaranteed,
-            "pull_count": self.pull_count,
-        }
-        self.db_ops.save_user_state(self.user_id, state_data)
-        self.db_ops.save_pull_history_batch(self.user_id, pull_history_batch)
+        self._save_pull_data(pull_history_batch)
 
         # 按星级和类型排序：星级高的在前，星级相同的角色在前
-        def sort_key(item):
-            # 星级高的在前（降序），角色优先于武器（角色=0，武器=1）
-            # 将稀有度转换为数值进行比较
-            rarity_value = {"5star": 5, "4star": 4, "3star": 3}.get(item.rarity, 0)
-            return (-rarity_value, 0 if item.type == "character" else 1)
-
-        # 排序结果
-        sorted_items = sorted(items, key=sort_key)
+        items.sort(key=attrgetter("sort_key"))
 
-        return sorted_items
+        return items
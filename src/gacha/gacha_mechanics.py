@@ -4,6 +4,8 @@
 """
 
 import random
+from dataclasses import dataclass
+from typing import Any
 
 from astrbot.api import logger
 
@@ -11,6 +13,200 @@ from ..item_data.item_manager import Item, ItemManager
 from .cardpool_manager import CardPoolConfig
 
 
+# 各卡池五星概率表缓存：id(卡池配置) -> (卡池配置, 概率表)
+# 卡池配置修改时会替换为新实例，因此按实例缓存即可保证概率表与配置一致
+_rate_5star_tables: dict[int, tuple[CardPoolConfig, tuple[float, ...]]] = {}
+_RATE_TABLE_CACHE_SIZE = 64
+
+
+def _sorted_soft_pity(progression: dict[str, Any]) -> list[dict[str, Any]]:
+    """软保区间按起始位置排序（防止 JSON 数据乱序）"""
+    return sorted(progression.get("soft_pity", []), key=lambda x: x["start_pull"])
+
+
+def _compute_rate_5star(
+    current_number: int, base_rate: float, sorted_pity: list[dict[str, Any]]
+) -> float:
+    """
+    按软保区间计算第 current_number 抽的五星概率（不含硬保底）
+
+    Args:
+        current_number: 距上个五星的抽数
+        base_rate: 基础五星概率
+        sorted_pity: 按起始位置排序后的软保区间
+
+    Returns:
+        float: 本次抽到五星的概率 (0.0-1.0)
+    """
+    final_prob = base_rate
+
+    # 遍历每一个区间
+    for interval in sorted_pity:
+        start = interval["start_pull"]
+        end = interval["end_pull"]
+        increment = interval["increment"]
+
+        if current_number >= start:
+            # 计算在当前区间内走过的步数
+            # 如果当前抽数超过了区间终点，则取区间全长；否则取当前抽数到起点的距离
+            steps_in_this_interval = min(current_number, end) - start + 1
+
+            # 累加增量
+            final_prob += steps_in_this_interval * increment
+
+            # 如果 target_pull 还没达到这个区间的终点，说明增量计算到此为止
+            if current_number <= end:
+                break
+        else:
+            # 如果 target_pull 还没到这个区间的起点，因为是有序的，后续区间也不用看了
+            break
+
+    # 概率最高为 100% (1.0)
+    return min(final_prob, 1.0)
+
+
+def _build_rate_4star_table(pool_config: CardPoolConfig) -> tuple[float, ...]:
+    """
+    构建卡池的四星概率表
+
+    硬保底之前为基础概率，硬保底当抽为硬保底概率，超出硬保底的抽数不在表中
+
+    Args:
+        pool_config: 卡池配置对象
+
+    Returns:
+        tuple: 各抽数对应的四星概率
+    """
+    probs = pool_config.probability_progression["4star"]
+    hard_pity_pull = probs.get("hard_pity_pull", 0)
+    base_4star_rate = pool_config.probability_settings.get("base_4star_rate", 0.06)
+    if hard_pity_pull < 0:
+        return ()
+    return (base_4star_rate,) * hard_pity_pull + (probs.get("hard_pity_rate", 1),)
+
+
+def _get_rate_5star_table(pool_config: CardPoolConfig) -> tuple[float, ...]:
+    """
+    获取卡池的五星概率表
+
+    概率表下标为距上个五星的抽数，覆盖硬保底之前的所有抽数，
+    同一卡池配置只在首次抽卡时计算一次
+
+    Args:
+        pool_config: 卡池配置对象
+
+    Returns:
+        tuple: 各抽数对应的五星概率
+    """
+    cached = _rate_5star_tables.get(id(pool_config))
+    if cached is not None and cached[0] is pool_config:
+        return cached[1]
+
+    progression = pool_config.probability_progression["5star"]
+    hard_pity_pull = progression.get("hard_pity_pull", 95)
+    base_rate = pool_config.probability_settings.get("base_5star_rate", 0.008)
+    sorted_pity = _sorted_soft_pity(progression)
+    table = tuple(
+        _compute_rate_5star(n, base_rate, sorted_pity) for n in range(hard_pity_pull)
+    )
+
+    if len(_rate_5star_tables) >= _RATE_TABLE_CACHE_SIZE:
+        _rate_5star_tables.clear()
+    _rate_5star_tables[id(pool_config)] = (pool_config, table)
+    return table
+
+
+@dataclass(frozen=True, slots=True)
+class _PoolView:
+    """卡池物品视图
+
+    按稀有度、UP状态和物品类型预先分组的卡池物品，同一卡池配置和物品数据只构建一次
+    """
+
+    items_by_rarity: dict[str, list[Item]]  # 按稀有度分组的物品
+    up_items_by_rarity: dict[str, list[Item]]  # 按稀有度分组的UP物品
+    typed_items_by_rarity: dict[str, dict[str, list[Item]]]  # 按稀有度和类型分组的物品
+    typed_up_items_by_rarity: dict[str, dict[str, list[Item]]]  # 同上，仅UP物品
+    rate_up_5star_ids: frozenset[str]  # 五星UP物品external_id集合
+    rate_up_4star_ids: frozenset[str]  # 四星UP物品external_id集合
+    up_5star_rate: float  # 五星UP概率
+    up_4star_rate: float  # 四星UP概率
+    role_4star_rate: float  # 四星武器概率阈值，随机数超过该值时为角色
+    hard_pity_4star_pull: int  # 四星硬保底抽数
+    rate_5star_table: tuple[float, ...]  # 五星概率表，下标为距上个五星的抽数
+    rate_4star_table: tuple[float, ...]  # 四星概率表，下标为距上个四星的抽数
+
+
+def _build_pool_view(
+    pool_config: CardPoolConfig, all_items: dict[str, Item]
+) -> _PoolView:
+    """
+    根据卡池配置从全部物品中筛选并分组卡池物品
+
+    Args:
+        pool_config: 卡池配置对象
+        all_items: 全部物品对象，键为物品external_id
+
+    Returns:
+        _PoolView: 卡池物品视图
+    """
+    # 获取包含物品配置
+    included_item_ids = pool_config.included_item_ids
+    prob_settings = pool_config.probability_settings
+
+    # 根据包含的物品，筛选出允许的物品
+    # 配置中的UP物品保持列表以便序列化，视图中转为集合供成员判断使用
+    rate_up_5star_ids = frozenset(pool_config.rate_up_item_ids.get("5star", ()))
+    rate_up_4star_ids = frozenset(pool_config.rate_up_item_ids.get("4star", ()))
+
+    # 按稀有度、UP状态和物品类型分组的物品，在一次遍历中同时填充
+    items_by_rarity = {"5star": [], "4star": [], "3star": []}
+    up_items_by_rarity = {"5star": [], "4star": []}
+    typed_items_by_rarity = {rarity: {} for rarity in items_by_rarity}
+    typed_up_items_by_rarity = {rarity: {} for rarity in up_items_by_rarity}
+    up_ids_by_rarity = {"5star": rate_up_5star_ids, "4star": rate_up_4star_ids}
+
+    # 筛选物品，同一物品在包含物品配置中重复出现时只保留第一次
+    seen_ids = set()
+    for config_item_ids in included_item_ids.values():
+        for config_item_id in config_item_ids:
+            item = all_items.get(config_item_id)
+            if item is None or config_item_id in seen_ids:
+                continue
+            seen_ids.add(config_item_id)
+
+            rarity = item.rarity
+            bucket = items_by_rarity.get(rarity)
+            if bucket is None:
+                continue
+            bucket.append(item)
+            typed_items_by_rarity[rarity].setdefault(item.type, []).append(item)
+
+            up_ids = up_ids_by_rarity.get(rarity)
+            if up_ids and item.external_id in up_ids:
+                up_items_by_rarity[rarity].append(item)
+                typed_up_items_by_rarity[rarity].setdefault(item.type, []).append(
+                    item
+                )
+
+    return _PoolView(
+        items_by_rarity=items_by_rarity,
+        up_items_by_rarity=up_items_by_rarity,
+        typed_items_by_rarity=typed_items_by_rarity,
+        typed_up_items_by_rarity=typed_up_items_by_rarity,
+        rate_up_5star_ids=rate_up_5star_ids,
+        rate_up_4star_ids=rate_up_4star_ids,
+        up_5star_rate=prob_settings.get("up_5star_rate", 0.5),
+        up_4star_rate=prob_settings.get("up_4star_rate", 0.5),
+        role_4star_rate=prob_settings.get("_4star_role_rate", 0.06),
+        hard_pity_4star_pull=pool_config.probability_progression["4star"].get(
+            "hard_pity_pull", 10
+        ),
+        rate_5star_table=_get_rate_5star_table(pool_config),
+        rate_4star_table=_build_rate_4star_table(pool_config),
+    )
+
+
 class GachaMechanics:
     """抽卡机制类，负责核心的概率和保底逻辑"""
 
@@ -24,45 +220,35 @@ class GachaMechanics:
         if item_data_manager is None:
             item_data_manager = ItemManager()
         self.item_data_manager = item_data_manager
+        # 卡池物品视图缓存：id(卡池配置) -> (卡池配置, 物品对象字典, 卡池物品视图)
+        self._pool_views: dict[
+            int, tuple[CardPoolConfig, dict[str, Item], _PoolView]
+        ] = {}
 
-    def _filter_items_by_rarity(self, items: dict, rarity: str) -> list:
-        """根据稀有度筛选物品
-
-        Args:
-            items: 物品字典
-            rarity: 稀有度
-
-        Returns:
-            符合稀有度的物品列表
-        """
-        return [item for item in items.values() if item.rarity == rarity]
-
-    def _filter_up_items(self, items: list, up_ids: list) -> list:
-        """过滤掉UP物品
-
-        Args:
-            items: 物品列表
-            up_ids: UP物品external_id列表
-
-        Returns:
-            非UP物品列表
+    def _get_pool_view(self, pool_config: CardPoolConfig) -> _PoolView:
         """
-        # 使用external_id过滤
-        return [
-            item for item in items if getattr(item, "external_id", None) not in up_ids
-        ]
+        获取卡池物品视图
 
-    def _filter_items_by_type(self, items: list, item_type: str) -> list:
-        """根据物品类型筛选物品
+        卡池配置修改时会替换为新实例，物品数据变化时物品管理器会重建物品对象字典，
+        两者都未变化时复用已构建的视图
 
         Args:
-            items: 物品列表
-            item_type: 物品类型
+            pool_config: 卡池配置对象
 
         Returns:
-            符合类型的物品列表
+            _PoolView: 卡池物品视图
         """
-        return [item for item in items if item.type == item_type]
+        all_items = self.item_data_manager.get_item_objects()
+        cached = self._pool_views.get(id(pool_config))
+        if (
+            cached is not None
+            and cached[0] is pool_config
+            and cached[1] is all_items
+        ):
+            return cached[2]
+        view = _build_pool_view(pool_config, all_items)
+        self._pool_views[id(pool_config)] = (pool_config, all_items, view)
+        return view
 
     def calculate_rate_5star(
         self, rate_number: int, pool_config: CardPoolConfig
@@ -77,54 +263,20 @@ class GachaMechanics:
         Returns:
             float: 本次抽到五星的概率 (0.0-1.0)
         """
-        # 获取硬保底值
-        hard_pity_pull = pool_config.probability_progression["5star"].get(
-            "hard_pity_pull", 95
-        )
-        hard_pity_rate = pool_config.probability_progression["5star"].get(
-            "hard_pity_rate", 1.0
-        )
-
         current_number = rate_number + 1
-        # 硬保底处理：当达到硬保底次数时，直接返回1.0
-        if current_number >= hard_pity_pull:
-            return hard_pity_rate
-
-        # 使用配置管理器的 calculate_5star_rate 方法，该方法已经支持特定卡池
-        final_prob = pool_config.probability_settings.get("base_5star_rate", 0.008)
-
-        # 1. 软保区间按起始位置排序（防止 JSON 数据乱序）
-        sorted_pity = pool_config.probability_progression["5star"].get("soft_pity", [])
-        if not sorted_pity:
-            # 如果配置缺失或为空，仅返回基础概率（防止崩溃，但可能不符合预期）
-            # 实际上硬保底逻辑在上面已经处理了，所以这里返回基础概率是安全的兜底
-            return min(final_prob, 1.0)
-            
-        sorted_pity = sorted(sorted_pity, key=lambda x: x["start_pull"])
-
-        # 2. 遍历每一个区间
-        for interval in sorted_pity:
-            start = interval["start_pull"]
-            end = interval["end_pull"]
-            increment = interval["increment"]
-
-            if current_number >= start:
-                # 计算在当前区间内走过的步数
-                # 如果当前抽数超过了区间终点，则取区间全长；否则取当前抽数到起点的距离
-                steps_in_this_interval = min(current_number, end) - start + 1
-
-                # 累加增量
-                final_prob += steps_in_this_interval * increment
-
-                # 如果 target_pull 还没达到这个区间的终点，说明增量计算到此为止
-                if current_number <= end:
-                    break
-            else:
-                # 如果 target_pull 还没到这个区间的起点，因为是有序的，后续区间也不用看了
-                break
-
-        # 3. 概率最高为 100% (1.0)
-        return min(final_prob, 1.0)
+        table = _get_rate_5star_table(pool_config)
+        if 0 <= current_number < len(table):
+            return table[current_number]
+
+        # 硬保底处理：当达到硬保底次数时，直接返回硬保底概率
+        progression = pool_config.probability_progression["5star"]
+        if current_number >= len(table):
+            return progression.get("hard_pity_rate", 1.0)
+        return _compute_rate_5star(
+            current_number,
+            pool_config.probability_settings.get("base_5star_rate", 0.008),
+            _sorted_soft_pity(progression),
+        )
 
     def calculate_rate_4star(
         self, rate_number: int, pool_config: CardPoolConfig
@@ -153,6 +305,26 @@ class GachaMechanics:
             raise ValueError(f"四星保底计数错误：{current_number}")
         return local_rate
 
+    def _rate_5star(
+        self, view: _PoolView, rate_number: int, pool_config: CardPoolConfig
+    ) -> float:
+        """从卡池视图的概率表中查找五星概率，表外的抽数交给 calculate_rate_5star"""
+        current_number = rate_number + 1
+        table = view.rate_5star_table
+        if 0 <= current_number < len(table):
+            return table[current_number]
+        return self.calculate_rate_5star(rate_number, pool_config)
+
+    def _rate_4star(
+        self, view: _PoolView, rate_number: int, pool_config: CardPoolConfig
+    ) -> float:
+        """从卡池视图的概率表中查找四星概率，表外的抽数交给 calculate_rate_4star"""
+        current_number = rate_number + 1
+        table = view.rate_4star_table
+        if 0 <= current_number < len(table):
+            return table[current_number]
+        return self.calculate_rate_4star(rate_number, pool_config)
+
     def execute_pull(
         self,
         cardpool_config: CardPoolConfig,
@@ -173,20 +345,20 @@ class GachaMechanics:
             tuple: (抽取到的物品, 更新后的五星保底, 更新后的四星保底, 更新后的五星保底状态, 更新后的四星保底状态)
         """
 
+        # 绑定到局部变量，本次抽卡中的多次取随机数省去模块属性查找
+        rand = random.random
+
         # 用于对抽取物判断的随机浮点数，区间[0, 1)
-        local_random = random.random()
-        # 从配置获取
+        local_random = rand()
+        # 从配置获取，卡池物品和各项概率参数在卡池视图中只读取一次
         pool_config = cardpool_config
-        prob_settings = pool_config.probability_settings
-        up_5star_rate = prob_settings.get("up_5star_rate", 0.5)
-        up_4star_rate = prob_settings.get("up_4star_rate", 0.5)
-        _4star_role_rate = prob_settings.get("_4star_role_rate", 0.06)
-        _4star_hard_pity_pull = pool_config.probability_progression["4star"].get(
-            "hard_pity_pull", 10
-        )
-        _5star_hard_pity_pull = pool_config.probability_progression["5star"].get(
-            "hard_pity_pull", 80
-        )
+        view = self._get_pool_view(pool_config)
+        up_5star_rate = view.up_5star_rate
+        up_4star_rate = view.up_4star_rate
+        _4star_role_rate = view.role_4star_rate
+        _4star_hard_pity_pull = view.hard_pity_4star_pull
+        rate_up_5star_ids = view.rate_up_5star_ids
+        rate_up_4star_ids = view.rate_up_4star_ids
 
         # 变量初始化
         local_item = None
@@ -195,49 +367,9 @@ class GachaMechanics:
         new_pity_5star = pity_5star
         new_pity_4star = pity_4star
 
-        # 获取包含物品配置
-        included_item_ids = pool_config.included_item_ids
-
-        # 根据包含的物品，筛选出允许的物品
-        rate_up_5star_ids = pool_config.rate_up_item_ids.get("5star", [])
-        rate_up_4star_ids = pool_config.rate_up_item_ids.get("4star", [])
-
-        # 获取包含物品 - 从ItemManager获取所有物品对象
-        all_items = self.item_data_manager.get_item_objects()
-
-        # 根据卡池配置筛选物品
-        items = {}
-
-        # 筛选物品
-        for rarity in included_item_ids:
-            for config_item_id in included_item_ids[rarity]:
-                if config_item_id in all_items:
-                    items[config_item_id] = all_items[config_item_id]
-
-        # 按稀有度分组物品
-        items_by_rarity = {
-            "5star": [item for item in items.values() if item.rarity == "5star"],
-            "4star": [item for item in items.values() if item.rarity == "4star"],
-            "3star": [item for item in items.values() if item.rarity == "3star"],
-        }
-
-        # 按稀有度和UP状态分组物品
-        up_items_by_rarity = {
-            "5star": [
-                item
-                for item in items_by_rarity["5star"]
-                if getattr(item, "external_id", None) in rate_up_5star_ids
-            ],
-            "4star": [
-                item
-                for item in items_by_rarity["4star"]
-                if getattr(item, "external_id", None) in rate_up_4star_ids
-            ],
-        }
-
         # >核心抽卡逻辑<
         # 1.检查是否抽到五星物品
-        if self.calculate_rate_5star(pity_5star + 1, pool_config) > local_random:
+        if self._rate_5star(view, pity_5star + 1, pool_config) > local_random:
             # 抽到五星，重置五星保底计数
             new_pity_5star = 0
 
@@ -248,38 +380,33 @@ class GachaMechanics:
             # 尝试获取五星物品
             local_item = self._get_item_with_fallback(
                 base_rarity="5star",
-                is_up=(not _5star_guaranteed and random.random() < up_5star_rate),
-                items_by_rarity=items_by_rarity,
-                up_items_by_rarity=up_items_by_rarity,
+                is_up=(not _5star_guaranteed and rand() < up_5star_rate),
+                view=view,
                 fallback_path=["4star", "3star"],
             )
 
             # 更新保底状态
-            if (
-                local_item
-                and getattr(local_item, "external_id", None) in rate_up_5star_ids
-            ):
+            if local_item and local_item.external_id in rate_up_5star_ids:
                 _5star_guaranteed = False
             else:
                 _5star_guaranteed = True
 
         # 2.检查是否抽到四星物品
-        elif self.calculate_rate_4star(pity_4star + 1, pool_config) > local_random:
+        elif self._rate_4star(view, pity_4star + 1, pool_config) > local_random:
             # 抽到四星物品，重置四星保底计数
             new_pity_4star = 0
             # 五星保底计数+1
             new_pity_5star += 1
 
             # 检测是否抽到了四星角色
-            item_type = "character" if random.random() > _4star_role_rate else "weapon"
+            item_type = "character" if rand() > _4star_role_rate else "weapon"
 
             # 尝试获取四星物品
-            is_up = rate_up_4star_ids and random.random() < up_4star_rate
+            is_up = rate_up_4star_ids and rand() < up_4star_rate
             local_item = self._get_item_with_fallback(
                 base_rarity="4star",
                 is_up=is_up,
-                items_by_rarity=items_by_rarity,
-                up_items_by_rarity=up_items_by_rarity,
+                view=view,
                 fallback_path=["3star", "5star"],
                 item_type=item_type,
             )
@@ -296,14 +423,18 @@ class GachaMechanics:
             new_pity_4star += 1
             new_pity_5star += 1
 
-            # 尝试获取三星物品
-            local_item = self._get_item_with_fallback(
-                base_rarity="3star",
-                is_up=False,
-                items_by_rarity=items_by_rarity,
-                up_items_by_rarity=up_items_by_rarity,
-                fallback_path=["4star", "5star"],
-            )
+            # 三星是最常见的结果，卡池有三星物品时直接抽取，无需构建回退优先级
+            three_star_items = view.items_by_rarity["3star"]
+            if three_star_items:
+                local_item = random.choice(three_star_items)
+            else:
+                # 尝试通过回退路径获取物品
+                local_item = self._get_item_with_fallback(
+                    base_rarity="3star",
+                    is_up=False,
+                    view=view,
+                    fallback_path=["4star", "5star"],
+                )
 
         # 返回更新后的状态
         return (
@@ -318,8 +449,7 @@ class GachaMechanics:
         self,
         base_rarity: str,
         is_up: bool,
-        items_by_rarity: dict[str, list[Item]],
-        up_items_by_rarity: dict[str, list[Item]],
+        view: _PoolView,
         fallback_path: list[str],
         item_type: str | None = None,
     ) -> Item:
@@ -329,9 +459,7 @@ class GachaMechanics:
         Args:
             base_rarity: 基础稀有度
             is_up: 是否为UP物品
-            items_by_rarity: 按稀有度分组的物品列表
-            up_items_by_rarity: 按稀有度分组的UP物品列表
-            rate_up_ids: UP物品ID列表
+            view: 卡池物品视图
             fallback_path: 回退路径，优先级从高到低
             item_type: 物品类型（可选）
 
@@ -364,15 +492,15 @@ class GachaMechanics:
         for rarity, is_up_item in priority_list:
             # 获取候选物品列表
             if is_up_item:
-                candidates = up_items_by_rarity.get(rarity, [])
+                candidates = view.up_items_by_rarity.get(rarity, [])
+                typed_candidates = view.typed_up_items_by_rarity.get(rarity)
             else:
-                candidates = items_by_rarity.get(rarity, [])
+                candidates = view.items_by_rarity.get(rarity, [])
+                typed_candidates = view.typed_items_by_rarity.get(rarity)
 
-            # 如果指定了物品类型，进一步筛选
-            if item_type:
-                filtered_candidates = [
-                    item for item in candidates if item.type == item_type
-                ]
+            # 如果指定了物品类型，优先使用该类型的物品
+            if item_type and typed_candidates:
+                filtered_candidates = typed_candidates.get(item_type)
                 if filtered_candidates:
                     candidates = filtered_candidates
 
@@ -381,23 +509,7 @@ class GachaMechanics:
                 selected_item = random.choice(candidates)
                 return selected_item
 
-        # 所有优先级都尝试过，仍然没有物品，尝试从所有可用物品中随机选择
-        all_items = []
-        for rarity in items_by_rarity:
-            all_items.extend(items_by_rarity[rarity])
-        for rarity in up_items_by_rarity:
-            all_items.extend(up_items_by_rarity[rarity])
-
-        # 去重
-        unique_items = list({item.external_id: item for item in all_items}.values())
-
-        if unique_items:
-            selected_item = random.choice(unique_items)
-            logger.warning(
-                f"[偏移重抽] 所有优先级都尝试过，从所有可用物品中随机选择: {selected_item.name}"
-            )
-            return selected_item
-        else:
-            # 极端情况：没有任何物品可用，抛出异常
-            logger.error("[偏移重抽] 没有任何物品可用")
-            raise ValueError("没有任何物品可用")
+        # 每条回退路径都覆盖了全部稀有度，且UP物品是同稀有度物品的子集，
+        # 所有优先级都没有候选物品说明卡池中没有任何物品可用
+        logger.error("[偏移重抽] 没有任何物品可用")
+        raise ValueError("没有任何物品可用")
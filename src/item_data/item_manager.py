@@ -8,10 +8,24 @@ from typing import Any
 
 from ..db.item_db_operations import ItemDBOperations
 
+# 稀有度对应的排序权重，星级越高数值越大
+_RARITY_RANK = {"5star": 5, "4star": 4, "3star": 3}
+
 
 class Item:
     """统一物品类，包含所有物品共有的属性"""
 
+    __slots__ = (
+        "external_id",
+        "name",
+        "rarity",
+        "type",
+        "affiliated_type",
+        "portrait_path",
+        "portrait_url",
+        "sort_key",
+    )
+
     def __init__(
         self,
         name: str,
@@ -43,6 +57,11 @@ class Item:
         self.affiliated_type = affiliated_type
         self.portrait_path = portrait_path
         self.portrait_url = portrait_url
+        # 展示排序键：星级高的在前，星级相同时角色在前
+        self.sort_key = (
+            -_RARITY_RANK.get(rarity, 0),
+            0 if item_type == "character" else 1,
+        )
 
     @staticmethod
     @lru_cache(maxsize=128)  # 限制缓存大小为128个物品，可根据需要调整
@@ -160,17 +179,24 @@ class ItemManager:
         self.table_name = f"{config_group}_items"
         # 加载所有物品数据到内存缓存
         self._item_details = self.db_ops.load_all_items(self.table_name)
+        # 物品对象缓存，物品数据变化时置空，下次访问时重建
+        self._item_objects: dict[str, Item] | None = None
 
     def set_config_group(self, config_group: str):
         """切换配置组
 
+        配置组未变化时保留已加载的物品数据和物品对象缓存
+
         Args:
             config_group: 新的配置组名称
         """
+        if config_group == self.config_group:
+            return
         self.config_group = config_group
         self.table_name = f"{config_group}_items"
         # 重新加载物品数据
         self._item_details = self.db_ops.load_all_items(self.table_name)
+        self._item_objects = None
 
     def is_item_exists(self, item_id: str) -> bool:
         """检测物品是否存在于数据库中"""
@@ -224,15 +250,20 @@ class ItemManager:
         """
         获取所有物品对象
 
+        物品数据未变化时返回同一个字典，调用方不应修改
+
         Returns:
             包含所有物品对象的字典，键为物品ID
         """
+        if self._item_objects is not None:
+            return self._item_objects
         items = {}
         for item_id, item_data in self._item_details.items():
             try:
                 items[item_id] = Item.from_dict(item_data)
             except ValueError:
                 continue
+        self._item_objects = items
         return items
 
     def add_item(self, item_data: dict[str, Any]) -> bool:
@@ -249,6 +280,7 @@ class ItemManager:
         if result:
             # 更新内存缓存
             self._item_details[item_data["external_id"]] = item_data
+            self._item_objects = None
         return result
 
     def add_items_batch(self, items_data: list) -> bool:
@@ -269,6 +301,26 @@ class ItemManager:
                 external_id = item_data.get("external_id")
                 if external_id:
                     self._item_details[external_id] = item_data
+            self._item_objects = None
+        return result
+
+    def replace_items(self, items_data: list) -> bool:
+        """
+        用给定的物品列表整体替换数据库中的物品
+
+        Args:
+            items_data: 包含多个物品信息字典的列表
+
+        Returns:
+            成功返回True，失败返回False
+        """
+        result = self.db_ops.replace_items(items_data, self.table_name)
+        if result:
+            # 重建内存缓存
+            self._item_details = {
+                item_data["external_id"]: item_data for item_data in items_data
+            }
+            self._item_objects = None
         return result
 
     def update_item(self, item_id: str, update_data: dict[str, Any]) -> bool:
@@ -286,6 +338,7 @@ class ItemManager:
         if result and item_id in self._item_details:
             # 更新内存缓存
             self._item_details[item_id].update(update_data)
+            self._item_objects = None
         return result
 
     def delete_item(self, item_id: str) -> bool:
@@ -302,6 +355,7 @@ class ItemManager:
         if result and item_id in self._item_details:
             # 更新内存缓存
             del self._item_details[item_id]
+            self._item_objects = None
         return result
 
     def get_items_by_rarity(self, rarity: str) -> list:
@@ -392,7 +392,19 @@ def items() -> Response:
     elif request.method == "POST":
         # 添加物品
         try:
-            if isinstance(data, list):
+            if isinstance(data, list) and request.args.get("replace") == "true":
+                # 整表替换，避免先清空再导入时出现空表
+                result = item_ops.replace_items(data, table_name)
+                if result:
+                    print(
+                        f"[IMPORT_LOG] [{log_time}] 整表替换: 成功写入 {len(data)} 个物品到表 {table_name}"
+                    )
+                    return jsonify(
+                        {"success": True, "message": f"成功替换为 {len(data)} 个物品"}
+                    )
+                else:
+                    return jsonify({"success": False, "message": "替换物品失败"})
+            elif isinstance(data, list):
                 # 批量添加
                 result = item_ops.add_items_batch(data, table_name)
                 if result:
@@ -473,7 +485,6 @@ def items() -> Response:
         try:
             # 检查是否是清空表的请求
             if request.args.get("clear_all") == "true":
-                # 暂时使用 clear_table 方法，因为 clear_table_with_transaction 可能未被类型检查器识别
                 result = item_ops.clear_table(table_name)
                 if result:
                     print(f"[IMPORT_LOG] [{log_time}] 清空表: 成功清空表 {table_name}")